@@ -1,26 +1,177 @@
+import errno
+import gzip
 import os
 import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+ARCHIVE_MODES = ('move', 'safe')
+COMPRESSIONS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+_COPY_BUFFER = 4 * 1024 * 1024
+
 
 class Archiver:
-    def __init__(self, input_dir: str, archive_input_dir: str, archive_processed_dir: str):
+    """
+    Moves raw and processed files into the archive folders.
+
+    ``mode='move'`` keeps the original ``shutil.move`` behaviour. ``mode='safe'``
+    renames atomically when source and archive share a filesystem; otherwise
+    (or when ``compression`` is 'gzip' / 'zstd') it copies to a temp name in
+    the archive, fsyncs, renames into place and only then removes the source,
+    so a crash never leaves a half-written archive file. Transfers run on a
+    pool of ``workers`` threads.
+    """
+
+    def __init__(self, input_dir: str, archive_input_dir: str, archive_processed_dir: str,
+                 mode: str = 'move', compression: str = None, workers: int = 4):
+        if mode not in ARCHIVE_MODES:
+            raise ValueError(f"Unknown archive mode {mode!r}, expected one of {ARCHIVE_MODES}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression!r}, expected gzip or zstd")
+        if compression and mode != 'safe':
+            raise ValueError("compression requires mode='safe'")
+        if compression == 'zstd':
+            _require_zstd()
+
         self.input_dir = input_dir
         self.archive_input_dir = archive_input_dir
         self.archive_processed_dir = archive_processed_dir
+        self.mode = mode
+        self.compression = compression
+        self.workers = max(1, workers or 1)
         os.makedirs(self.archive_input_dir, exist_ok=True)
         os.makedirs(self.archive_processed_dir, exist_ok=True)
 
     def archive(self, original: str, processed_file: str):
-        # pull the same timestamp
-        safe_ts = Path(processed_file).stem.split("_")[-1]
+        if self.mode == 'move':
+            self._move_pair(original, processed_file)
+        else:
+            self.archive_many([(original, processed_file)])
 
-        # rename raw to <stem>_<ts><ext>
+    def archive_raw(self, original: str, safe_ts: str) -> str:
+        """Archives only the raw file, as <stem>_<safe_ts><ext>."""
+        src = os.path.join(self.input_dir, original)
         stem, ext = Path(original).stem, Path(original).suffix
-        new_raw = f"{stem}_{safe_ts}{ext}"
+        dst = os.path.join(self.archive_input_dir, f"{stem}_{safe_ts}{ext}")
+        if self.mode == 'move':
+            return shutil.move(src, dst)
+        if not os.path.isfile(src):
+            raise FileNotFoundError(errno.ENOENT, "No such file to archive", src)
+        return self._transfer(src, dst)
 
+    def archive_processed(self, processed_file: str) -> str:
+        """Archives only a processed file, keeping its name."""
+        if self.mode == 'move':
+            return shutil.move(processed_file, self.archive_processed_dir)
+        if not os.path.isfile(processed_file):
+            raise FileNotFoundError(errno.ENOENT, "No such file to archive", processed_file)
+        return self._transfer(processed_file, os.path.join(self.archive_processed_dir, Path(processed_file).name))
+
+    def archive_many(self, pairs: list[tuple[str, str]]) -> list[str]:
+        """
+        Archives several (original, processed_file) pairs as one batch and
+        returns the archived paths. Every source is checked up front, so a
+        missing file fails the batch before anything is moved.
+        """
+        if self.mode == 'move':
+            for original, processed_file in pairs:
+                self._move_pair(original, processed_file)
+            return []
+
+        transfers = []
+        for original, processed_file in pairs:
+            raw_src = os.path.join(self.input_dir, original)
+            transfers.append((raw_src, os.path.join(self.archive_input_dir, self._raw_name(original, processed_file))))
+            transfers.append((processed_file, os.path.join(self.archive_processed_dir, Path(processed_file).name)))
+        for src, _ in transfers:
+            if not os.path.isfile(src):
+                raise FileNotFoundError(errno.ENOENT, "No such file to archive", src)
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(transfers)) or 1,
+                                thread_name_prefix='archiver') as pool:
+            futures = [pool.submit(self._transfer, src, dst) for src, dst in transfers]
+            return [f.result() for f in futures]
+
+    def _move_pair(self, original: str, processed_file: str):
         shutil.move(
             os.path.join(self.input_dir, original),
-            os.path.join(self.archive_input_dir, new_raw)
+            os.path.join(self.archive_input_dir, self._raw_name(original, processed_file))
         )
         shutil.move(processed_file, self.archive_processed_dir)
+
+    @staticmethod
+    def _raw_name(original: str, processed_file: str) -> str:
+        # pull the same timestamp; rename raw to <stem>_<ts><ext>
+        safe_ts = Path(processed_file).stem.split("_")[-1]
+        stem, ext = Path(original).stem, Path(original).suffix
+        return f"{stem}_{safe_ts}{ext}"
+
+    def _transfer(self, src: str, dst: str) -> str:
+        if not self.compression:
+            try:
+                os.rename(src, dst)
+                _fsync_dir(os.path.dirname(dst))
+                return dst
+            except OSError as exc:
+                if exc.errno != errno.EXDEV:
+                    raise
+
+        dst += COMPRESSIONS[self.compression]
+        tmp = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(src, 'rb') as fin, open(tmp, 'wb') as raw_out:
+                with self._compressed(raw_out) as fout:
+                    shutil.copyfileobj(fin, fout, _COPY_BUFFER)
+                raw_out.flush()
+                os.fsync(raw_out.fileno())
+            shutil.copystat(src, tmp)
+            os.replace(tmp, dst)
+            _fsync_dir(os.path.dirname(dst))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.remove(src)
+        return dst
+
+    def _compressed(self, raw_out):
+        if self.compression == 'gzip':
+            return gzip.GzipFile(fileobj=raw_out, mode='wb')
+        if self.compression == 'zstd':
+            return _require_zstd().ZstdCompressor().stream_writer(raw_out, closefd=False)
+        return _Passthrough(raw_out)
+
+
+class _Passthrough:
+    def __init__(self, f):
+        self._f = f
+
+    def __enter__(self):
+        return self._f
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _fsync_dir(path: str):
+    # persists the rename itself; not supported on every platform
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _require_zstd():
+    try:
+        import zstandard
+    except ImportError as exc:
+        raise ImportError("compression='zstd' requires the 'zstandard' package") from exc
+    return zstandard
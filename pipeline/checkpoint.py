@@ -0,0 +1,76 @@
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from sqlalchemy import text
+
+from pipeline.schema import create_checkpoint_table
+
+CHECKPOINT_TABLE = 'iso_checkpoint'
+
+
+@dataclass(frozen=True)
+class FileRun:
+    file_key: str
+    filename: str
+    source: str
+    ts: str
+    # row_start -> row_end of every chunk already committed
+    committed: dict[int, int] = field(default_factory=dict)
+
+
+class CheckpointStore:
+    """
+    Records which row ranges of an input file are committed to ``iso_address``.
+
+    A file is identified by name, size and mtime, so a rerun of the same file
+    resumes while a changed file with the same name starts over. The row
+    range is written in the transaction that saves the chunk's rows (see
+    ``DatabaseRepository.save(on_commit=...)``), so the records never claim
+    rows that were not saved. ``finish`` drops the records once the file is done.
+    """
+
+    def __init__(self, engine, clock=time.time):
+        self.engine = engine
+        self._clock = clock
+        create_checkpoint_table(self.engine)
+
+    @staticmethod
+    def file_key(path: str) -> str:
+        st = os.stat(path)
+        return hashlib.sha1(f"{Path(path).name}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()
+
+    def begin(self, path: str, source: str, ts: str) -> FileRun:
+        """
+        Starts or resumes ``path``. A resumed run keeps the ``source`` and
+        ``ts`` of the first attempt, so all its rows carry the same stamps.
+        """
+        key = self.file_key(path)
+        with self.engine.begin() as conn:
+            rows = conn.execute(text(
+                f'SELECT row_start, row_end, source, processed_timestamp FROM "{CHECKPOINT_TABLE}" '
+                'WHERE file_key = :key ORDER BY row_start'
+            ), {'key': key}).fetchall()
+        if rows:
+            source, ts = rows[0][2], rows[0][3]
+        return FileRun(key, Path(path).name, source, ts, {r[0]: r[1] for r in rows})
+
+    def record(self, conn, run: FileRun, row_start: int, row_end: int):
+        """Marks rows [row_start, row_end) committed, inside the caller's transaction."""
+        conn.execute(text(
+            f'DELETE FROM "{CHECKPOINT_TABLE}" WHERE file_key = :key AND row_start = :row_start'
+        ), {'key': run.file_key, 'row_start': row_start})
+        conn.execute(text(
+            f'INSERT INTO "{CHECKPOINT_TABLE}" '
+            '(file_key, filename, source, processed_timestamp, row_start, row_end, committed_at) '
+            'VALUES (:key, :filename, :source, :ts, :row_start, :row_end, :now)'
+        ), {
+            'key': run.file_key, 'filename': run.filename, 'source': run.source, 'ts': run.ts,
+            'row_start': row_start, 'row_end': row_end, 'now': self._clock(),
+        })
+
+    def finish(self, run: FileRun):
+        with self.engine.begin() as conn:
+            conn.execute(text(f'DELETE FROM "{CHECKPOINT_TABLE}" WHERE file_key = :key'), {'key': run.file_key})
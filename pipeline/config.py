@@ -22,19 +22,89 @@ class Config:
         self.input_dir = _resolve('input_dir')
         self.extracted_dir = _resolve('extracted_dir')
         self.processed_dir = _resolve('processed_dir')
+        output = config_file.get('output', {}) or {}
+        # None keeps the input's extension
+        self.output_format = output.get('format') or None
+        extract = config_file.get('extract', {}) or {}
+        self.extract_workers = int(extract.get('workers', 1))
         archive = config_file.get('archive', {}) or {}
         self.archive_input_dir = str((project_root / archive.get('input_dir', '')).resolve())
         self.archive_processed_dir = str((project_root / archive.get('processed_dir', '')).resolve())
+        self.archive_mode = archive.get('mode', 'move')
+        self.archive_compression = archive.get('compression') or None
+        self.archive_workers = int(archive.get('workers', 4))
 
         datasource = config_file.get('datasource', {}) or {}
         self.datasource_url = datasource.get('url', '')
         self.datasource_driver = datasource.get('driverClassName', '')
         self.datasource_username = datasource.get('username', '')
         self.datasource_password = datasource.get('password', '')
+        jar = datasource.get('jar', 'resources/data/h2-2.3.232.jar')
+        self.datasource_jar = str((project_root / jar).resolve()) if jar else None
 
         database = config_file.get('database', {}) or {}
         self.database_url = database.get('url', '')
         self.table_name = database.get('table_name', '')
+        # 'sqlalchemy' (database.url) or 'jdbc' (the datasource section, e.g. embedded H2)
+        self.database_backend = database.get('backend', 'sqlalchemy')
+
+        parser = config_file.get('parser', {}) or {}
+        self.parser_with_prob = bool(parser.get('with_prob', False))
+        threshold = parser.get('confidence_threshold')
+        self.parser_confidence_threshold = float(threshold) if threshold is not None else None
+        self.parser_fallback_model = parser.get('fallback_model') or None
+
+        reference = config_file.get('reference_data', {}) or {}
+        self.reference_postcode_path = str((project_root / reference['postcode']).resolve()) \
+            if reference.get('postcode') else None
+        self.reference_city_path = str((project_root / reference['city']).resolve()) \
+            if reference.get('city') else None
+
+        normalize = config_file.get('normalize', {}) or {}
+        self.normalize_enabled = bool(normalize.get('enabled', False))
+        self.normalize_expand_abbreviations = bool(normalize.get('expand_abbreviations', True))
+        self.normalize_abbreviations = dict(normalize.get('abbreviations') or {})
+        self.normalize_cache_size = int(normalize.get('cache_size', 0))
+
+        checkpoint = config_file.get('checkpoint', {}) or {}
+        self.checkpoint_enabled = bool(checkpoint.get('enabled', False))
+        self.checkpoint_chunk_rows = int(checkpoint.get('chunk_rows', 50000))
+
+        profiling = config_file.get('profiling', {}) or {}
+        self.profiling_enabled = bool(profiling.get('enabled', False))
+        self.profiling_sample_rate = float(profiling.get('sample_rate', 1.0))
+        self.profiling_torch = bool(profiling.get('torch', False))
+        self.profiling_interval_ms = float(profiling.get('interval_ms', 10))
+
+        watch = config_file.get('watch', {}) or {}
+        self.watch_poll_interval = float(watch.get('poll_interval', 2))
+        self.watch_settle_seconds = float(watch.get('settle_seconds', 2))
+        self.watch_use_inotify = bool(watch.get('use_inotify', True))
+        self.watch_retry_backoff = float(watch.get('retry_backoff', 5))
+        self.watch_max_retry_backoff = float(watch.get('max_retry_backoff', 300))
+
+        queue = config_file.get('queue', {}) or {}
+        self.queue_shard_rows = int(queue.get('shard_rows', 50000))
+        self.queue_lease_seconds = float(queue.get('lease_seconds', 300))
+        self.queue_max_attempts = int(queue.get('max_attempts', 3))
+
+        service = config_file.get('service', {}) or {}
+        self.service_host = service.get('host', '127.0.0.1')
+        self.service_port = int(service.get('port', 8080))
+        self.service_max_batch_size = int(service.get('max_batch_size', 64))
+        self.service_max_latency_ms = float(service.get('max_latency_ms', 10))
+
+        tuning = config_file.get('tuning', {}) or {}
+        self.tuning_enabled = bool(tuning.get('enabled', False))
+        self.tuning_memory_limit_mb = float(tuning['memory_limit_mb']) if tuning.get('memory_limit_mb') else None
+        self.tuning_model_batch = {
+            'initial': 256, 'min_size': 16, 'max_size': 8192, 'target_seconds': 2.0,
+            **(tuning.get('model_batch') or {})
+        }
+        self.tuning_db_chunk = {
+            'initial': 1000, 'min_size': 100, 'max_size': 50000, 'target_seconds': 0.5,
+            **(tuning.get('db_chunk') or {})
+        }
 
     def __repr__(self):
         return (
@@ -5,15 +5,22 @@ from pathlib import Path
 
 import pandas as pd
 
+from pipeline.xlsx_reader import count_xlsx_rows, read_xlsx, read_xlsx_rows
+
 warnings.filterwarnings("ignore", category=UserWarning)
 
 
 class ExcelExtractor:
     REQUIRED_COLUMNS = ['ID', 'ADDRESSLINE1', 'ADDRESSLINE2', 'ADDRESSLINE3']
 
-    def __init__(self, input_dir: str, extracted_dir: str):
+    def __init__(self, input_dir: str, extracted_dir: str, workers: int = 1):
+        """
+        With ``workers`` > 1, .xlsx files are parsed by that many processes
+        (see ``pipeline.xlsx_reader``); .xls files always go through pandas.
+        """
         self.input_dir = input_dir
         self.extracted_dir = extracted_dir
+        self.workers = workers
         os.makedirs(self.extracted_dir, exist_ok=True)
 
     def list_files(self) -> list[str]:
@@ -25,7 +32,10 @@ class ExcelExtractor:
     def extract(self, filename: str) -> str:
         # 1) read
         in_path = os.path.join(self.input_dir, filename)
-        df = pd.read_excel(in_path, engine='openpyxl')[self.REQUIRED_COLUMNS]
+        if self.workers > 1 and in_path.lower().endswith('.xlsx'):
+            df = read_xlsx(in_path, columns=self.REQUIRED_COLUMNS, workers=self.workers)
+        else:
+            df = pd.read_excel(in_path, engine='openpyxl')[self.REQUIRED_COLUMNS]
 
         # 2) compute one timestamp for this file
         ts = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%S")
@@ -37,3 +47,33 @@ class ExcelExtractor:
         df.to_excel(out_path, index=False)
 
         return out_path
+
+    def count_rows(self, filename: str) -> int:
+        """
+        Number of data rows (header excluded), as ``extract`` would read them.
+        .xlsx sheets are counted by streaming through their rows, since the
+        ``<dimension>`` some writers record can be stale or missing.
+        """
+        in_path = os.path.join(self.input_dir, filename)
+        if in_path.lower().endswith('.xlsx'):
+            return count_xlsx_rows(in_path)
+        return len(pd.read_excel(in_path, engine='openpyxl'))
+
+    def read_rows(self, filename: str, row_start: int, row_end: int) -> pd.DataFrame:
+        """
+        Reads data rows [row_start, row_end) of ``filename`` (0-based, header excluded).
+
+        .xlsx shards parse only their own rows (see ``read_xlsx_rows``). Other
+        files go through pandas, which parses every row before ``row_start``,
+        so reading all shards of such a file is quadratic in its length.
+        """
+        in_path = os.path.join(self.input_dir, filename)
+        if in_path.lower().endswith('.xlsx'):
+            df = read_xlsx_rows(in_path, row_start, row_end, columns=self.REQUIRED_COLUMNS)
+        else:
+            df = pd.read_excel(
+                in_path, engine='openpyxl',
+                skiprows=range(1, row_start + 1), nrows=row_end - row_start
+            )[self.REQUIRED_COLUMNS]
+        df.index = range(row_start, row_start + len(df))
+        return df
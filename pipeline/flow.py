@@ -1,20 +1,31 @@
+import argparse
+import datetime
+import os
+import shutil
+import socket
 import warnings
 from pathlib import Path
+
+import pandas as pd
 from prefect import flow, get_run_logger
 
 from pipeline.config import Config
 from pipeline.extractor import ExcelExtractor
 from pipeline.parser import AddressParserService
 from pipeline.repository import DatabaseRepository
+from pipeline.jdbc_repository import JdbcRepository
 from pipeline.archiver import Archiver
+from pipeline.watcher import DirectoryWatcher
+from pipeline.work_queue import WorkQueue, Heartbeat
+from pipeline.tuning import AdaptiveBatchSizer
+from pipeline.checkpoint import CheckpointStore
+from pipeline.profiling import StageProfiler
+from pipeline.writer import open_writer, output_path
 
 warnings.filterwarnings("ignore", category=UserWarning)
 
 
-@flow(name="DeepParse Workflow")
-def deepparse_flow(config_path: str = None):
-    config_dir = Config(path=config_path) if config_path else Config()
-
+def _build_pipeline(config_dir):
     for dirs in [
         config_dir.input_dir,
         config_dir.extracted_dir,
@@ -24,14 +35,120 @@ def deepparse_flow(config_path: str = None):
     ]:
         Path(dirs).mkdir(parents=True, exist_ok=True)
 
-    extractor = ExcelExtractor(config_dir.input_dir, config_dir.extracted_dir)
-    parser_svc = AddressParserService()
-    repo = DatabaseRepository(config=config_dir)
+    model_sizer = chunk_sizer = None
+    if config_dir.tuning_enabled:
+        model_sizer = AdaptiveBatchSizer(
+            'model_batch', memory_limit_mb=config_dir.tuning_memory_limit_mb, **config_dir.tuning_model_batch
+        )
+        chunk_sizer = AdaptiveBatchSizer(
+            'db_chunk', memory_limit_mb=config_dir.tuning_memory_limit_mb, **config_dir.tuning_db_chunk
+        )
+
+    extractor = ExcelExtractor(config_dir.input_dir, config_dir.extracted_dir, workers=config_dir.extract_workers)
+    parser_svc = AddressParserService.from_config(config_dir, batch_sizer=model_sizer)
+    if config_dir.database_backend == 'jdbc':
+        repo = JdbcRepository(config=config_dir, chunk_sizer=chunk_sizer)
+    else:
+        repo = DatabaseRepository(config=config_dir, chunk_sizer=chunk_sizer)
     archiver = Archiver(
         input_dir=config_dir.input_dir,
         archive_input_dir=config_dir.archive_input_dir,
-        archive_processed_dir=config_dir.archive_processed_dir
+        archive_processed_dir=config_dir.archive_processed_dir,
+        mode=config_dir.archive_mode,
+        compression=config_dir.archive_compression,
+        workers=config_dir.archive_workers
     )
+    return extractor, parser_svc, repo, archiver
+
+
+def _build_checkpoints(config_dir, repo):
+    if not config_dir.checkpoint_enabled:
+        return None
+    if config_dir.database_backend != 'sqlalchemy':
+        raise ValueError("checkpoints are stored through database.url; use database.backend 'sqlalchemy'")
+    return CheckpointStore(repo.engine)
+
+
+def _process_file(filename, config_dir, extractor, parser_svc, repo, archiver, logger, checkpoints=None,
+                  profiler=None):
+    profile = (profiler or StageProfiler()).for_file(filename)
+    if checkpoints is not None:
+        _process_file_checkpointed(
+            filename, config_dir, extractor, parser_svc, repo, archiver, logger, checkpoints, profile
+        )
+        return
+    with profile.stage('extract'):
+        extracted_path = extractor.extract(filename)
+    with profile.stage('parse', inference=True):
+        parsed_df, processed_path = parser_svc.parse_file(extracted_path, config_dir.processed_dir)
+    with profile.stage('save'):
+        repo.save(parsed_df)
+
+    with profile.stage('archive'):
+        archiver.archive(filename, processed_path)
+    StageProfiler.write(profile, processed_path, archiver.archive_processed_dir)
+
+    logger.info(f"Completed file: {filename}")
+
+
+def _process_file_checkpointed(filename, config_dir, extractor, parser_svc, repo, archiver, logger, checkpoints,
+                               profile):
+    """
+    Parses and saves ``filename`` in chunks of ``checkpoint.chunk_rows``. Each
+    chunk's rows and its checkpoint commit in one transaction, and its output
+    is kept as a part file, so a rerun after a crash skips committed chunks
+    without repeating inference and rebuilds the processed file from the parts.
+    """
+    in_path = str(Path(config_dir.input_dir) / filename)
+    with profile.stage('extract'):
+        extracted_path = extractor.extract(filename)
+    ts = datetime.datetime.utcnow().isoformat() + 'Z'
+    run = checkpoints.begin(in_path, source=Path(extracted_path).name, ts=ts)
+    if run.committed:
+        logger.info(f"Resuming {filename}: {len(run.committed)} chunks already committed")
+
+    df = pd.read_excel(extracted_path, engine='openpyxl')
+    parts_dir = Path(config_dir.processed_dir) / '.parts' / run.file_key
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    parts = []
+    for start in range(0, len(df), config_dir.checkpoint_chunk_rows):
+        end = min(start + config_dir.checkpoint_chunk_rows, len(df))
+        part = parts_dir / f"part-{start:012d}.parquet"
+        parts.append(part)
+        if run.committed.get(start) == end and part.exists():
+            continue
+
+        with profile.stage('parse', inference=True):
+            parsed_df = parser_svc.parse(df.iloc[start:end], source=run.source, ts=run.ts)
+        tmp = part.with_suffix('.tmp')
+        parsed_df.to_parquet(tmp, index=False)
+        os.replace(tmp, part)
+        with profile.stage('save'):
+            repo.save(parsed_df, on_commit=lambda conn, s=start, e=end: checkpoints.record(conn, run, s, e))
+        logger.info(f"Committed {filename} rows {start}-{end}")
+
+    processed_path = output_path(config_dir.processed_dir, run.source, run.ts, config_dir.output_format)
+    # one part in memory at a time
+    with open_writer(processed_path) as writer:
+        for part in parts:
+            writer.write(pd.read_parquet(part))
+
+    # the records go before the input is archived: a crash in between re-parses, never skips
+    checkpoints.finish(run)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    with profile.stage('archive'):
+        archiver.archive(filename, processed_path)
+    StageProfiler.write(profile, processed_path, archiver.archive_processed_dir)
+
+    logger.info(f"Completed file: {filename}")
+
+
+@flow(name="DeepParse Workflow")
+def deepparse_flow(config_path: str = None):
+    config_dir = Config(path=config_path) if config_path else Config()
+    extractor, parser_svc, repo, archiver = _build_pipeline(config_dir)
+    checkpoints = _build_checkpoints(config_dir, repo)
+    profiler = StageProfiler.from_config(config_dir)
 
     logger = get_run_logger()
     files = extractor.list_files()
@@ -41,14 +158,137 @@ def deepparse_flow(config_path: str = None):
         logger.info(f"Processing {len(files)} files...")
 
     for filename in files:
-        extracted_path = extractor.extract(filename)
-        parsed_df, processed_path = parser_svc.parse_file(extracted_path, config_dir.processed_dir)
-        repo.save(parsed_df)
+        _process_file(filename, config_dir, extractor, parser_svc, repo, archiver, logger, checkpoints, profiler)
+
+
+@flow(name="DeepParse Watch")
+def deepparse_watch_flow(config_path: str = None, max_files: int | None = None):
+    """
+    Long-running ingest: builds the pipeline (and loads the model) once, then
+    processes each file as soon as it has finished landing in ``input_dir``.
+    A failing file is logged, left in place and retried with a backoff; the
+    watch keeps going.
+    """
+    config_dir = Config(path=config_path) if config_path else Config()
+    extractor, parser_svc, repo, archiver = _build_pipeline(config_dir)
+    checkpoints = _build_checkpoints(config_dir, repo)
+    profiler = StageProfiler.from_config(config_dir)
+    watcher = DirectoryWatcher(
+        config_dir.input_dir,
+        poll_interval=config_dir.watch_poll_interval,
+        settle_seconds=config_dir.watch_settle_seconds,
+        use_inotify=config_dir.watch_use_inotify,
+        retry_backoff=config_dir.watch_retry_backoff,
+        max_retry_backoff=config_dir.watch_max_retry_backoff
+    )
+
+    logger = get_run_logger()
+    logger.info(f"Watching {config_dir.input_dir} for Excel files...")
+
+    processed = 0
+    for filename in watcher:
+        try:
+            _process_file(filename, config_dir, extractor, parser_svc, repo, archiver, logger, checkpoints,
+                          profiler)
+        except Exception:
+            logger.exception(f"Failed file: {filename}")
+            watcher.retry(filename)
+        processed += 1
+        if max_files is not None and processed >= max_files:
+            watcher.stop()
+            break
 
-        archiver.archive(filename, processed_path)
 
-        logger.info(f"Completed file: {filename}")
+def _process_shard(shard, queue, worker_id, config_dir, extractor, parser_svc, repo, archiver, logger,
+                   profiler=None):
+    profile = (profiler or StageProfiler()).for_file(shard.filename)
+    with Heartbeat(queue, shard, worker_id) as beat:
+        with profile.stage('extract'):
+            df = extractor.read_rows(shard.filename, shard.row_start, shard.row_end)
+        ts = datetime.datetime.utcnow().isoformat() + 'Z'
+        with profile.stage('parse', inference=True):
+            parsed_df = parser_svc.parse(df, source=shard.filename, ts=ts)
+        if beat.lost:
+            logger.warning(f"Lost lease on {shard.filename} rows {shard.row_start}-{shard.row_end}; skipping")
+            return
+        with profile.stage('save'):
+            repo.save(parsed_df)
+
+    safe_ts = ts.replace('-', '').replace(':', '')
+    stem = Path(shard.filename).stem
+    processed_path = output_path(
+        config_dir.processed_dir, f"{stem}_rows{shard.row_start}-{shard.row_end}{Path(shard.filename).suffix}",
+        ts, config_dir.output_format
+    )
+    with open_writer(processed_path) as writer:
+        writer.write(parsed_df)
+    with profile.stage('archive'):
+        archiver.archive_processed(processed_path)
+    StageProfiler.write(profile, processed_path, archiver.archive_processed_dir)
+
+    if not queue.complete(shard, worker_id):
+        logger.warning(f"Shard {shard.task_id} was reclaimed before it completed")
+        return
+    logger.info(f"Completed {shard.filename} rows {shard.row_start}-{shard.row_end}")
+
+    if queue.begin_archive(shard.filename):
+        archiver.archive_raw(shard.filename, safe_ts)
+        queue.end_archive(shard.filename)
+        logger.info(f"Completed file: {shard.filename}")
+
+
+@flow(name="DeepParse Worker")
+def deepparse_worker_flow(config_path: str = None, worker_id: str | None = None, max_shards: int | None = None):
+    """
+    Distributed mode: queues every file in ``input_dir`` as row-range shards in
+    the shared database, then claims and processes shards until none are left.
+    Run one per host; workers never process the same shard concurrently, and
+    shards of a worker that dies are reclaimed once its lease expires.
+    """
+    config_dir = Config(path=config_path) if config_path else Config()
+    if config_dir.database_backend != 'sqlalchemy':
+        raise ValueError("worker mode shares its queue through database.url; use database.backend 'sqlalchemy'")
+    extractor, parser_svc, repo, archiver = _build_pipeline(config_dir)
+    queue = WorkQueue(
+        repo.engine,
+        lease_seconds=config_dir.queue_lease_seconds,
+        max_attempts=config_dir.queue_max_attempts
+    )
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    profiler = StageProfiler.from_config(config_dir)
+
+    logger = get_run_logger()
+    for filename in extractor.list_files():
+        added = queue.enqueue_file(filename, extractor.count_rows(filename), config_dir.queue_shard_rows)
+        if added:
+            logger.info(f"Queued {filename} as {added} shards")
+
+    processed = 0
+    while max_shards is None or processed < max_shards:
+        shard = queue.claim(worker_id)
+        if shard is None:
+            break
+        try:
+            _process_shard(shard, queue, worker_id, config_dir, extractor, parser_svc, repo, archiver, logger,
+                           profiler)
+        except Exception:
+            logger.exception(f"Failed {shard.filename} rows {shard.row_start}-{shard.row_end}")
+            queue.fail(shard, worker_id)
+        processed += 1
+
+    logger.info(f"Worker {worker_id} finished {processed} shards; queue: {queue.counts()}")
 
 
 if __name__ == "__main__":
-    deepparse_flow()
+    cli = argparse.ArgumentParser(description="Run the DeepParse pipeline.")
+    cli.add_argument("--config", "-c", type=str, default=None, help="Path to config.yml")
+    cli.add_argument("--watch", action="store_true", help="Keep running and ingest files as they arrive")
+    cli.add_argument("--worker", action="store_true", help="Process shards from the shared work queue")
+    args = cli.parse_args()
+
+    if args.worker:
+        deepparse_worker_flow(config_path=args.config)
+    elif args.watch:
+        deepparse_watch_flow(config_path=args.config)
+    else:
+        deepparse_flow(config_path=args.config)
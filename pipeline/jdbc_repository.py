@@ -0,0 +1,135 @@
+import atexit
+import threading
+import time
+
+import pandas as pd
+
+from pipeline.config import Config
+from pipeline.tuning import AdaptiveBatchSizer
+
+COLUMNS = [
+    'id', 'full_address', 'house_number', 'road', 'city', 'state', 'postcode', 'country',
+    'filename', 'processed_timestamp', 'extracted_by', 'status', 'confidence',
+]
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS {table} (
+    record_id BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+    id VARCHAR(36),
+    full_address VARCHAR(500),
+    house_number VARCHAR(10),
+    road VARCHAR(128),
+    city VARCHAR(50),
+    state VARCHAR(20),
+    postcode VARCHAR(20),
+    country VARCHAR(6),
+    filename VARCHAR(255),
+    processed_timestamp VARCHAR(32),
+    extracted_by VARCHAR(50),
+    status VARCHAR(16) NOT NULL,
+    confidence DOUBLE PRECISION
+)
+"""
+
+# jaydebeapi starts the JVM on the first connect and JPype cannot restart it,
+# so connections are opened once per process and shared by every repository
+_connections = {}
+_lock = threading.Lock()
+
+
+def _require_jaydebeapi():
+    try:
+        import jaydebeapi
+    except ImportError as e:
+        raise ImportError("the jdbc backend requires jaydebeapi and JPype1 (pip install jaydebeapi JPype1)") from e
+    return jaydebeapi
+
+
+def _connect(driver: str, url: str, username: str, password: str, jar: str):
+    key = (driver, url, username)
+    with _lock:
+        conn = _connections.get(key)
+        if conn is None:
+            jaydebeapi = _require_jaydebeapi()
+            conn = jaydebeapi.connect(driver, url, [username or '', password or ''], jar or None)
+            conn.jconn.setAutoCommit(False)
+            _connections[key] = conn
+        return conn
+
+
+@atexit.register
+def close_connections():
+    with _lock:
+        for conn in _connections.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+        _connections.clear()
+
+
+class JdbcRepository:
+    """
+    Writes parsed rows over JDBC, for the embedded H2 setup under ``datasource``.
+
+    Rows are upserted with ``MERGE INTO ... KEY(id)`` in ``executemany``
+    batches (one prepared statement, JDBC ``addBatch``/``executeBatch``) and
+    committed once per ``save``. The table therefore keeps one row per id.
+    """
+
+    def __init__(self, config: Config, chunk_sizer: AdaptiveBatchSizer = None):
+        self.table_name = config.table_name or 'iso_address'
+        self.chunk_sizer = chunk_sizer
+        self.conn = _connect(
+            config.datasource_driver, config.datasource_url,
+            config.datasource_username, config.datasource_password, config.datasource_jar
+        )
+        self._merge_sql = (
+            f"MERGE INTO {self.table_name} ({', '.join(COLUMNS)}) KEY(id) "
+            f"VALUES ({', '.join('?' * len(COLUMNS))})"
+        )
+        self._execute(_DDL.format(table=self.table_name))
+        self._execute(f"CREATE INDEX IF NOT EXISTS ix_{self.table_name}_id ON {self.table_name} (id)")
+
+    def _execute(self, sql: str):
+        cur = self.conn.cursor()
+        try:
+            cur.execute(sql)
+            self.conn.commit()
+        finally:
+            cur.close()
+
+    def save(self, data_frame: pd.DataFrame, batch_size: int = 1000):
+        df = data_frame.rename(columns={"ID": "id"})
+        df = df[df['id'].notna()].astype({'id': str}).drop_duplicates('id', keep='last')
+        rows = _rows(df.reindex(columns=COLUMNS))
+        if not rows:
+            return
+
+        cur = self.conn.cursor()
+        try:
+            start = 0
+            while start < len(rows):
+                size = self.chunk_sizer.size if self.chunk_sizer else batch_size
+                batch = rows[start:start + size]
+                began = time.perf_counter()
+                cur.executemany(self._merge_sql, batch)
+                if self.chunk_sizer:
+                    self.chunk_sizer.record(len(batch), time.perf_counter() - began)
+                start += len(batch)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        finally:
+            cur.close()
+
+
+def _rows(df: pd.DataFrame) -> list[tuple]:
+    # JDBC binds Python str/float/None only: categoricals, numpy scalars and NaN are converted
+    columns = []
+    for name in COLUMNS:
+        s = df[name]
+        cast = float if name == 'confidence' else str
+        columns.append([None if pd.isna(v) else cast(v) for v in s.astype(object).tolist()])
+    return list(zip(*columns))
@@ -0,0 +1,84 @@
+import re
+
+import pandas as pd
+
+# street-type and unit abbreviations that appear interchangeably with the full word;
+# single-letter directions are left alone, since "E" or "N" is often a unit or a postcode part
+DEFAULT_ABBREVIATIONS = {
+    'st': 'street', 'str': 'street', 'rd': 'road', 'ave': 'avenue', 'av': 'avenue',
+    'blvd': 'boulevard', 'dr': 'drive', 'ln': 'lane', 'ct': 'court', 'pl': 'place',
+    'sq': 'square', 'ter': 'terrace', 'terr': 'terrace', 'cres': 'crescent', 'hwy': 'highway',
+    'pkwy': 'parkway', 'cir': 'circle', 'apt': 'apartment', 'ste': 'suite', 'fl': 'floor',
+    'bldg': 'building', 'mt': 'mount', 'ft': 'fort',
+}
+
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+class TextNormalizer:
+    """
+    Maps address text to a canonical key, so trivially different spellings
+    ("123 Main St." / "123  MAIN ST") dedupe and hit the same cache entry.
+
+    Steps, each optional: Unicode NFKC, case folding, punctuation to spaces,
+    whitespace collapse, and whole-word abbreviation expansion. Everything runs
+    through pandas ``.str`` methods over the whole column. The key is used only
+    for matching; the model always sees the original text.
+    """
+
+    def __init__(self, nfkc: bool = True, casefold: bool = True, collapse_punctuation: bool = True,
+                 expand_abbreviations: bool = True, abbreviations: dict[str, str] = None):
+        self.nfkc = nfkc
+        self.casefold = casefold
+        self.collapse_punctuation = collapse_punctuation
+        self.abbreviations = {}
+        if expand_abbreviations:
+            self.abbreviations = {**DEFAULT_ABBREVIATIONS, **{k.casefold(): v for k, v in (abbreviations or {}).items()}}
+        self._abbrev_re = re.compile(
+            r'\b(' + '|'.join(sorted(map(re.escape, self.abbreviations), key=len, reverse=True)) + r')\b',
+            flags=0 if casefold else re.IGNORECASE
+        ) if self.abbreviations else None
+
+    def normalize(self, values) -> pd.Series:
+        s = pd.Series(values, dtype=object).fillna('').astype(str)
+        if self.nfkc:
+            s = s.str.normalize('NFKC')
+        if self.casefold:
+            s = s.str.casefold()
+        if self.collapse_punctuation:
+            s = s.str.replace(_PUNCTUATION, ' ', regex=True)
+        s = s.str.replace(_WHITESPACE, ' ', regex=True).str.strip()
+        if self._abbrev_re is not None:
+            s = s.str.replace(self._abbrev_re, lambda m: self.abbreviations[m.group(1).casefold()], regex=True)
+        return s
+
+
+def collision_report(addresses, normalizer: TextNormalizer, examples: int = 5) -> dict:
+    """
+    Compares dedup on the raw (stripped) text with dedup on canonical keys:
+    how many distinct model inputs each leaves, and which keys absorbed the
+    most raw variants.
+    """
+    raw = pd.Series(addresses, dtype=object).fillna('').astype(str).str.strip()
+    raw = raw[raw != '']
+    keys = normalizer.normalize(raw)
+    distinct_raw = raw.nunique()
+    distinct_keys = keys.nunique()
+
+    variants = raw.groupby(keys.to_numpy()).nunique()
+    merged = variants[variants > 1].sort_values(ascending=False)
+    top = [
+        {'key': key, 'variants': int(n), 'sample': raw[keys == key].drop_duplicates().head(3).tolist()}
+        for key, n in merged.head(examples).items()
+    ]
+    rows = len(raw)
+    return {
+        'rows': rows,
+        'distinct_raw': int(distinct_raw),
+        'distinct_keys': int(distinct_keys),
+        'raw_duplicate_rate': 1 - distinct_raw / rows if rows else 0.0,
+        'key_duplicate_rate': 1 - distinct_keys / rows if rows else 0.0,
+        'keys_with_merged_variants': int(len(merged)),
+        'top_merged': top,
+    }
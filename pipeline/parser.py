@@ -1,13 +1,23 @@
 import re
 import datetime
+import time
 import warnings
+import numpy as np
 import pandas as pd
 import socket
 import getpass
+from collections.abc import Iterable, Iterator, Mapping
+from itertools import islice
+from pandas.api.types import union_categoricals
 from deepparse.parser import AddressParser
 from pathlib import Path
 from prefect import get_run_logger
 
+from pipeline.normalize import TextNormalizer
+from pipeline.refdata import ReferenceTable
+from pipeline.tuning import AdaptiveBatchSizer
+from pipeline.writer import open_writer, output_path
+
 warnings.filterwarnings("ignore", category=UserWarning)
 
 _COUNTRY_MAP = {
@@ -37,14 +47,185 @@ _CA_PROVINCES = {p.lower() for p in [
 
 _UK_PC = re.compile(r'\b[A-Z]{1,2}\d{1,2}\s*\d[A-Z]{2}\b', re.I)
 
+OUTPUT_COLUMNS = [
+    'ID', 'full_address', 'house_number', 'road', 'city', 'state', 'postcode',
+    'country', 'filename', 'processed_timestamp', 'extracted_by', 'status',
+]
+
+# Low-cardinality output columns are stored as categoricals; the rest use
+# Arrow-backed strings when pyarrow is available.
+CATEGORICAL_COLUMNS = ['country', 'filename', 'processed_timestamp', 'extracted_by', 'status']
+
+# only emitted when tag probabilities are requested
+NUMERIC_COLUMNS = ['confidence']
+
+_PARSED_FIELDS = ('house_number', 'road', 'city', 'state', 'postcode', 'country')
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+# addresses per Deepparse forward pass when no batch sizer is set (Deepparse's own default)
+DEFAULT_MODEL_BATCH_SIZE = 32
+
+
+def _string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return object
+    return pd.StringDtype('pyarrow')
+
+
+def _constant(value: str, n: int) -> pd.Categorical:
+    return pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), categories=[value])
+
+
+def _build_frame(columns: dict) -> pd.DataFrame:
+    string_dtype = _string_dtype()
+    data = {}
+    for name, values in columns.items():
+        if name in CATEGORICAL_COLUMNS:
+            data[name] = values if isinstance(values, pd.Categorical) else pd.Categorical(values)
+        elif name in NUMERIC_COLUMNS:
+            data[name] = np.asarray(values, dtype=np.float32)
+        else:
+            data[name] = pd.array(values, dtype=string_dtype) if string_dtype is not object \
+                else np.asarray(values, dtype=object)
+    return pd.DataFrame(data, columns=list(columns))
+
+
+def _input_chunks(data, chunk_size: int) -> Iterator[pd.DataFrame]:
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, len(data), chunk_size):
+            yield data.iloc[start:start + chunk_size]
+        return
+
+    if isinstance(data, (str, bytes)) or not isinstance(data, Iterable):
+        raise TypeError("data must be a DataFrame or an iterable of rows")
+
+    rows = iter(data)
+    offset = 0
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        yield pd.DataFrame(
+            [_input_row(r, offset + i) for i, r in enumerate(batch)],
+            columns=AddressParserService.INPUT_COLUMNS,
+        )
+        offset += len(batch)
+
+
+def _input_row(row, position: int) -> dict:
+    if isinstance(row, str):
+        return {'ID': str(position), 'ADDRESSLINE1': row, 'ADDRESSLINE2': '', 'ADDRESSLINE3': ''}
+    if isinstance(row, Mapping):
+        return {c: row.get(c, '') for c in AddressParserService.INPUT_COLUMNS}
+    values = list(row) + [''] * (len(AddressParserService.INPUT_COLUMNS) - len(row))
+    return dict(zip(AddressParserService.INPUT_COLUMNS, values))
+
+
+def _concat(chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Joins parsed chunks into one frame. Each chunk is split into its columns
+    as it arrives, and each output column is built and its pieces released
+    before the next one, so the peak is about one result plus one column
+    rather than two full copies.
+    """
+    pieces: dict[str, list] = {}
+    for chunk in chunks:
+        for col in chunk.columns:
+            pieces.setdefault(col, []).append(chunk[col].array)
+    if not pieces:
+        return _build_frame({c: [] for c in OUTPUT_COLUMNS})
+    data = {}
+    for col in list(pieces):
+        parts = pieces.pop(col)
+        if col in CATEGORICAL_COLUMNS:
+            # categories differ per chunk; a plain concat would fall back to object
+            data[col] = union_categoricals(parts, sort_categories=True)
+        else:
+            data[col] = pd.concat([pd.Series(p, copy=False) for p in parts], ignore_index=True).array
+        del parts
+    return pd.DataFrame(data, copy=False)
+
+
+def _concat_arrow(chunks: Iterable[pd.DataFrame]):
+    """Converts chunks to Arrow as they arrive and joins the tables without copying."""
+    pa = _require_pyarrow()
+    tables = [pa.Table.from_pandas(chunk, preserve_index=False) for chunk in chunks]
+    if not tables:
+        return pa.Table.from_pandas(_build_frame({c: [] for c in OUTPUT_COLUMNS}), preserve_index=False)
+    # dictionary index widths may differ between chunks
+    return pa.concat_tables(tables, promote_options='permissive')
+
+
+def _confidence(parsed_obj) -> float:
+    # with_prob=True tags each token as (token, (tag, probability))
+    probs = [
+        tag[1] for _, tag in getattr(parsed_obj, 'address_parsed_components', None) or []
+        if isinstance(tag, tuple)
+    ]
+    return min(probs) if probs else np.nan
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError("as_arrow=True requires the 'pyarrow' package") from exc
+    return pyarrow
+
 
 class AddressParserService:
     """
     Wraps Deepparse AddressParser for batch address parsing,
     emits a status column and normalizes ISO country codes.
     """
+    INPUT_COLUMNS = ['ID', 'ADDRESSLINE1', 'ADDRESSLINE2', 'ADDRESSLINE3']
+
+    def __init__(self, workers: int = None, extracted_by: str = None, with_prob: bool = False,
+                 confidence_threshold: float = None, fallback_model: str = None,
+                 postcode_table: str = None, city_table: str = None,
+                 batch_sizer: AdaptiveBatchSizer = None, normalizer: TextNormalizer = None,
+                 cache_size: int = 0, output_format: str = None):
+        """
+        With ``with_prob`` the model also returns tag probabilities and every
+        row gets a ``confidence`` score: the lowest tag probability among its
+        tokens. Rows scoring below ``confidence_threshold`` are re-parsed in
+        one extra batch by the attention-based ``fallback_model`` (a Deepparse
+        model type such as 'bpemb'), which is loaded on first use.
+
+        ``postcode_table`` / ``city_table`` are compiled reference tables (see
+        ``pipeline.refdata``) used, in that order, to fill ``state`` and
+        ``country`` when neither the model nor the rules found them.
+
+        With a ``batch_sizer`` the model is called on batches of the size it
+        picks, timed one by one, instead of once per chunk.
+
+        With a ``normalizer``, addresses sharing a canonical key are sent to
+        the model once per chunk (the first one's original text) and the
+        result is copied to the rest. ``cache_size`` > 0 also keeps that many
+        recent key results across chunks.
+
+        ``output_format`` ('xlsx', 'csv' or 'parquet') sets the type of the
+        processed file; by default it keeps the input's extension.
+        """
+        if (confidence_threshold is not None or fallback_model) and not with_prob:
+            raise ValueError("confidence_threshold and fallback_model require with_prob=True")
+        self.with_prob = with_prob
+        self.confidence_threshold = confidence_threshold
+        self.fallback_model = fallback_model
+        self._fallback_parser = None
+        self.batch_sizer = batch_sizer
+        self.normalizer = normalizer
+        self.cache_size = cache_size
+        self.output_format = output_format
+        self._cache: dict[str, tuple] = {}
+        self._reference = [
+            (field, ReferenceTable(path))
+            for field, path in (('postcode', postcode_table), ('city', city_table)) if path
+        ]
 
-    def __init__(self, workers: int = None, extracted_by: str = None):
         if extracted_by:
             self.extracted_by = extracted_by
         else:
@@ -55,85 +236,283 @@ class AddressParserService:
 
         self._parser = AddressParser()
 
-    def parse_file(self, extracted_path: str, processed_dir: str) -> tuple[pd.DataFrame, str]:
+    @classmethod
+    def from_config(cls, config, batch_sizer: AdaptiveBatchSizer = None) -> 'AddressParserService':
+        """Builds the service from the ``parser``, ``reference_data``, ``normalize`` and ``output`` settings."""
+        normalizer = TextNormalizer(
+            expand_abbreviations=config.normalize_expand_abbreviations,
+            abbreviations=config.normalize_abbreviations
+        ) if config.normalize_enabled else None
+        return cls(
+            with_prob=config.parser_with_prob,
+            confidence_threshold=config.parser_confidence_threshold,
+            fallback_model=config.parser_fallback_model,
+            postcode_table=config.reference_postcode_path,
+            city_table=config.reference_city_path,
+            batch_sizer=batch_sizer,
+            normalizer=normalizer,
+            cache_size=config.normalize_cache_size,
+            output_format=config.output_format
+        )
+
+    def parse_file(self, extracted_path: str, processed_dir: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[pd.DataFrame, str]:
+        """
+        Parses ``extracted_path`` and writes the processed file to
+        ``processed_dir``. Each chunk is appended to the file as soon as it
+        is parsed (see ``pipeline.writer``), and the file only appears under
+        its final name once it is complete.
+        """
         df = pd.read_excel(extracted_path, engine='openpyxl')
 
-        def join_lines(r):
-            parts = [
-                str(r.get('ADDRESSLINE1', '')).strip(),
-                str(r.get('ADDRESSLINE2', '')).strip(),
-                str(r.get('ADDRESSLINE3', '')).strip()
-            ]
-            return ', '.join(p for p in parts if p)
+        ts = datetime.datetime.utcnow().isoformat() + 'Z'
+        orig = Path(extracted_path).name
+        Path(processed_dir).mkdir(parents=True, exist_ok=True)
+        processed_file = output_path(processed_dir, orig, ts, self.output_format)
+
+        with open_writer(processed_file) as writer:
+            def written():
+                for chunk in self.iter_parse(df, source=orig, ts=ts, chunk_size=chunk_size):
+                    writer.write(chunk)
+                    yield chunk
 
-        df['full_address'] = df.apply(join_lines, axis=1)
+            result_df = _concat(written())
+            if not writer.rows:
+                writer.write(result_df)
 
-        parsed_objs = self._parser(list(df['full_address']))
-        parsed_map = {i: obj.to_dict() for i, obj in enumerate(parsed_objs)}
+        try:
+            logger = get_run_logger()
+            logger.info(f"Parsed {len(result_df)} addresses → {processed_file}")
+        except Exception:
+            pass
 
-        records = []
-        ts = datetime.datetime.utcnow().isoformat() + 'Z'
-        orig = Path(extracted_path).name
+        return result_df, processed_file
 
-        for i, row in df.iterrows():
-            d = parsed_map.get(i, {})
-
-            id_val = row.get('ID')
-            lines = [
-                row.get('ADDRESSLINE1', ''),
-                row.get('ADDRESSLINE2', ''),
-                row.get('ADDRESSLINE3', '')
-            ]
-            if pd.isna(id_val) or not str(id_val).strip() \
-                    or all(not str(x).strip() for x in lines):
-                status = 'INVALID'
-            elif all(str(x).strip() for x in lines):
-                status = 'PERFECT'
+    def parse(self, data, source: str = 'memory', ts: str = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, as_arrow: bool = False):
+        """
+        Parses ``data`` in memory and returns the whole result as one
+        DataFrame (or a ``pyarrow.Table`` when ``as_arrow`` is set).
+        """
+        chunks = self.iter_parse(data, source=source, ts=ts, chunk_size=chunk_size)
+        return _concat_arrow(chunks) if as_arrow else _concat(chunks)
+
+    def iter_parse(self, data, source: str = 'memory', ts: str = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE, as_arrow: bool = False) -> Iterator:
+        """
+        Parses ``data`` lazily, ``chunk_size`` rows at a time, without touching disk.
+
+        ``data`` is a DataFrame with ID / ADDRESSLINE1..3 columns, or any iterable
+        of rows where a row is a mapping with those keys, a sequence of
+        ``(ID, line1, line2, line3)`` or a bare address string (ID = position).
+        Every chunk shares one ``processed_timestamp``; chunks are DataFrames,
+        or ``pyarrow.RecordBatch`` objects when ``as_arrow`` is set.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+        if ts is None:
+            ts = datetime.datetime.utcnow().isoformat() + 'Z'
+        pa = _require_pyarrow() if as_arrow else None
+
+        for chunk in _input_chunks(data, chunk_size):
+            result = self.parse_dataframe(chunk, source=source, ts=ts)
+            yield pa.RecordBatch.from_pandas(result, preserve_index=False) if as_arrow else result
+
+    def parse_dataframe(self, df: pd.DataFrame, source: str, ts: str = None) -> pd.DataFrame:
+        """
+        Parses a frame holding ID / ADDRESSLINE1..3 columns and returns one
+        output record per input row, stamped with ``source`` and ``ts``.
+
+        Results are written straight into preallocated column arrays; no
+        per-row dict is kept. See ``_build_frame`` for the output dtypes.
+        """
+        if ts is None:
+            ts = datetime.datetime.utcnow().isoformat() + 'Z'
+
+        n = len(df)
+        ids = df['ID'].tolist() if 'ID' in df.columns else [None] * n
+        line1, line2, line3 = (
+            df[c].tolist() if c in df.columns else [''] * n
+            for c in ('ADDRESSLINE1', 'ADDRESSLINE2', 'ADDRESSLINE3')
+        )
+
+        full_address = np.empty(n, dtype=object)
+        status = np.empty(n, dtype=object)
+        for i in range(n):
+            parts = (str(line1[i]).strip(), str(line2[i]).strip(), str(line3[i]).strip())
+            full_address[i] = ', '.join(p for p in parts if p)
+
+            id_val = ids[i]
+            if pd.isna(id_val) or not str(id_val).strip() or not any(parts):
+                status[i] = 'INVALID'
+            elif all(parts):
+                status[i] = 'PERFECT'
             else:
-                status = 'PARTIAL'
+                status[i] = 'PARTIAL'
 
-            state_raw = (d.get('state') or d.get('Province') or '').strip()
-            country_raw = (d.get('country') or d.get('Country') or '').strip().lower()
+        parsed = self._run_model(full_address)
 
-            country = _COUNTRY_MAP.get(country_raw, '')
-            if not country and row.get('ADDRESSLINE3'):
-                country = _COUNTRY_MAP.get(str(row['ADDRESSLINE3']).strip().lower(), '')
-            if not country:
+        state = parsed['state']
+        country = np.empty(n, dtype=object)
+        for i in range(n):
+            state_raw = state[i]
+            code = _COUNTRY_MAP.get(parsed['country'][i].lower(), '')
+            if not code and line3[i]:
+                code = _COUNTRY_MAP.get(str(line3[i]).strip().lower(), '')
+            if not code:
                 if state_raw.lower() in _US_STATES:
-                    country = 'US'
+                    code = 'US'
                 elif state_raw.lower() in _CA_PROVINCES:
-                    country = 'CA'
-            if not country and _UK_PC.search(row['full_address']):
-                country = 'GB'
-
-            records.append({
-                'ID': str(id_val),
-                'full_address': row['full_address'],
-                'house_number': d.get('house_number') or d.get('StreetNumber'),
-                'road': d.get('road') or d.get('StreetName'),
-                'city': d.get('city') or d.get('Municipality'),
-                'state': state_raw,
-                'postcode': d.get('postcode') or d.get('PostalCode'),
-                'country': country,
-                'filename': f"{orig}_{ts}",
-                'processed_timestamp': ts,
-                'extracted_by': self.extracted_by,
-                'status': status,
-            })
-
-        result_df = pd.DataFrame(records)
+                    code = 'CA'
+            if not code and _UK_PC.search(full_address[i]):
+                code = 'GB'
+            country[i] = code
 
-        Path(processed_dir).mkdir(parents=True, exist_ok=True)
-        stem, ext = Path(orig).stem, Path(orig).suffix
-        safe_ts = ts.replace('-', '').replace(':', '')
-        out_name = f"{stem}_{safe_ts}{ext}"
-        processed_file = str(Path(processed_dir) / out_name)
-        result_df.to_excel(processed_file, index=False)
+        if self._reference:
+            self._fill_from_reference(parsed, state, country)
+
+        columns = {
+            'ID': [str(v) for v in ids],
+            'full_address': full_address,
+            'house_number': parsed['house_number'],
+            'road': parsed['road'],
+            'city': parsed['city'],
+            'state': state,
+            'postcode': parsed['postcode'],
+            'country': country,
+            'filename': _constant(f"{source}_{ts}", n),
+            'processed_timestamp': _constant(ts, n),
+            'extracted_by': _constant(self.extracted_by, n),
+            'status': status,
+        }
+        if self.with_prob:
+            columns['confidence'] = parsed['confidence']
+        return _build_frame(columns)
+
+    def _fill_from_reference(self, parsed: dict[str, np.ndarray], state: np.ndarray, country: np.ndarray):
+        for field, table in self._reference:
+            keys = parsed[field]
+            idx = np.flatnonzero(((state == '') | (country == '')) & pd.notna(keys))
+            if not len(idx):
+                continue
+            regions, countries = table.lookup(keys[idx])
+            fill_state = (state[idx] == '') & (regions != '')
+            state[idx[fill_state]] = regions[fill_state]
+            fill_country = (country[idx] == '') & (countries != '')
+            country[idx[fill_country]] = countries[fill_country]
+
+    def _run_model(self, addresses) -> dict[str, np.ndarray]:
+        """
+        Runs the model and scatters its tags into one array per field.
+        ``state`` and ``country`` default to '' so they can be matched directly.
+        """
+        n = len(addresses)
+        parsed = {f: np.full(n, None, dtype=object) for f in _PARSED_FIELDS}
+        parsed['state'][:] = ''
+        parsed['country'][:] = ''
+        parsed['confidence'] = np.full(n, np.nan, dtype=np.float32)
+
+        # Deepparse rejects blank addresses, so only non-blank positions are sent
+        positions = [i for i, a in enumerate(addresses) if a.strip()]
+        if self.normalizer is None:
+            self._scatter(self._parser, addresses, positions, parsed)
+            self._reparse_low_confidence(addresses, positions, parsed)
+        else:
+            self._scatter_deduped(addresses, positions, parsed)
+        return parsed
+
+    def _scatter_deduped(self, addresses, positions: list[int], parsed: dict[str, np.ndarray]):
+        if not positions:
+            return
+        pos = np.asarray(positions)
+        codes, keys = pd.factorize(self.normalizer.normalize([addresses[i] for i in positions]))
+        # first position carrying each key represents it
+        reps = pos[np.unique(codes, return_index=True)[1]]
+        fields = _PARSED_FIELDS + ('confidence',)
+
+        hits = [k for k in range(len(keys)) if keys[k] in self._cache]
+        for k in hits:
+            for field, value in zip(fields, self._cache[keys[k]]):
+                parsed[field][reps[k]] = value
+        hit_set = set(hits)
+        misses = [k for k in range(len(keys)) if k not in hit_set]
+        miss_positions = [int(reps[k]) for k in misses]
+        self._scatter(self._parser, addresses, miss_positions, parsed)
+        # before caching and scattering, so each key reaches the fallback at most once
+        self._reparse_low_confidence(addresses, miss_positions, parsed)
+
+        if self.cache_size > 0:
+            for k in misses:
+                self._cache[keys[k]] = tuple(parsed[field][reps[k]] for field in fields)
+            # dicts keep insertion order, so the oldest entries are dropped first
+            for key in list(islice(self._cache, max(len(self._cache) - self.cache_size, 0))):
+                del self._cache[key]
+
+        for field in fields:
+            parsed[field][pos] = parsed[field][reps[codes]]
 
         try:
             logger = get_run_logger()
-            logger.info(f"Parsed {len(result_df)} addresses → {processed_file}")
+            logger.info(
+                f"Sent {len(misses)}/{len(positions)} addresses to the model "
+                f"({len(positions) - len(keys)} duplicate keys, {len(hits)} cache hits)"
+            )
         except Exception:
             pass
 
-        return result_df, processed_file
+    def _reparse_low_confidence(self, addresses, candidates: list[int], parsed: dict[str, np.ndarray]):
+        if not self.fallback_model or self.confidence_threshold is None or not candidates:
+            return
+        candidates = np.asarray(candidates)
+        positions = [int(i) for i in candidates[parsed['confidence'][candidates] < self.confidence_threshold]]
+        if not positions:
+            return
+        if self._fallback_parser is None:
+            self._fallback_parser = AddressParser(model_type=self.fallback_model, attention_mechanism=True)
+        self._scatter(self._fallback_parser, addresses, positions, parsed)
+
+        try:
+            logger = get_run_logger()
+            logger.info(
+                f"Re-parsed {len(positions)}/{len(candidates)} low-confidence addresses "
+                f"with {self.fallback_model} (attention)"
+            )
+        except Exception:
+            pass
+
+    def _scatter(self, parser, addresses, positions: list[int], parsed: dict[str, np.ndarray]):
+        if not positions:
+            return
+        if self.batch_sizer is None:
+            self._scatter_batch(parser, addresses, positions, parsed)
+            return
+        start = 0
+        while start < len(positions):
+            batch = positions[start:start + self.batch_sizer.size]
+            began = time.perf_counter()
+            self._scatter_batch(parser, addresses, batch, parsed)
+            self.batch_sizer.record(len(batch), time.perf_counter() - began)
+            start += len(batch)
+
+    def _scatter_batch(self, parser, addresses, positions: list[int], parsed: dict[str, np.ndarray]):
+        batch = [addresses[i] for i in positions]
+        # with a sizer the whole sized batch is one forward pass, so its timing measures that size
+        batch_size = len(batch) if self.batch_sizer is not None else DEFAULT_MODEL_BATCH_SIZE
+        if self.with_prob:
+            parsed_objs = parser(batch, batch_size=batch_size, with_prob=True)
+        else:
+            parsed_objs = parser(batch, batch_size=batch_size)
+        # Deepparse unwraps single-element lists
+        if not isinstance(parsed_objs, list):
+            parsed_objs = [parsed_objs]
+
+        for i, obj in zip(positions, parsed_objs):
+            if self.with_prob:
+                parsed['confidence'][i] = _confidence(obj)
+            d = obj.to_dict()
+            parsed['house_number'][i] = d.get('house_number') or d.get('StreetNumber')
+            parsed['road'][i] = d.get('road') or d.get('StreetName')
+            parsed['city'][i] = d.get('city') or d.get('Municipality')
+            parsed['postcode'][i] = d.get('postcode') or d.get('PostalCode')
+            parsed['state'][i] = (d.get('state') or d.get('Province') or '').strip()
+            parsed['country'][i] = (d.get('country') or d.get('Country') or '').strip()
@@ -0,0 +1,187 @@
+import cProfile
+import contextlib
+import os
+import random
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+from prefect import get_run_logger
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every ``interval`` seconds from a
+    background thread and counts identical stacks, in the collapsed format
+    flamegraph tools read (``outer;inner;leaf count``). Its cost is one stack
+    walk per interval, whatever the code being sampled does.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.01):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def collapsed(self) -> str:
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class FileProfile:
+    """Profiles the stages of one file; see ``StageProfiler``."""
+
+    def __init__(self, interval: float, use_torch: bool):
+        self.interval = interval
+        self.use_torch = use_torch
+        self._profiles: dict[str, cProfile.Profile] = {}
+        self._samplers: dict[str, StackSampler] = {}
+        self._torch: dict[str, object] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str, inference: bool = False):
+        """
+        Profiles the block as stage ``name``. Entering a stage again adds to
+        its totals. With ``inference`` and the torch profiler enabled, torch
+        operator timings are recorded as well.
+        """
+        profile = self._profiles.setdefault(name, cProfile.Profile())
+        sampler = self._samplers.setdefault(name, StackSampler(threading.get_ident(), self.interval))
+        with contextlib.ExitStack() as stack:
+            if inference and self.use_torch:
+                stack.enter_context(self._torch_profiler(name))
+            sampler.start()
+            stack.callback(sampler.stop)
+            profile.enable()
+            stack.callback(profile.disable)
+            yield
+
+    def _torch_profiler(self, name: str):
+        import torch
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if torch.cuda.is_available():
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+        prof = torch.profiler.profile(activities=activities, record_shapes=True)
+        self._torch.setdefault(name, []).append(prof)
+        return prof
+
+    def write(self, out_dir: str) -> list[str]:
+        """Writes ``<stage>.pstats`` and ``<stage>.collapsed`` (plus torch traces) to ``out_dir``."""
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, profile in self._profiles.items():
+            path = out / f"{name}.pstats"
+            profile.dump_stats(str(path))
+            written.append(str(path))
+            path = out / f"{name}.collapsed"
+            path.write_text(self._samplers[name].collapsed())
+            written.append(str(path))
+        for name, profs in self._torch.items():
+            for i, prof in enumerate(profs):
+                path = out / f"{name}.torch.{i}.json"
+                prof.export_chrome_trace(str(path))
+                written.append(str(path))
+            path = out / f"{name}.torch.txt"
+            path.write_text('\n\n'.join(
+                p.key_averages().table(sort_by='self_cpu_time_total', row_limit=50) for p in profs
+            ))
+            written.append(str(path))
+        return written
+
+
+class _NoProfile:
+    def stage(self, name: str, inference: bool = False):
+        return contextlib.nullcontext()
+
+    def write(self, out_dir: str) -> list[str]:
+        return []
+
+
+class StageProfiler:
+    """
+    Opt-in profiling of pipeline stages, one profile per input file.
+
+    Each stage runs under cProfile (call counts and timings, saved as
+    pstats) and a stack sampler (collapsed stacks for flamegraphs). With
+    ``use_torch`` the inference stage also runs under ``torch.profiler``.
+    Only a ``sample_rate`` fraction of files is profiled, which keeps the
+    overhead low enough to leave it on in production.
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 1.0, use_torch: bool = False,
+                 interval_ms: float = 10, rng=random.random):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.use_torch = use_torch
+        self.interval = interval_ms / 1000
+        self._rng = rng
+
+    @classmethod
+    def from_config(cls, config) -> 'StageProfiler':
+        """
+        Reads the ``profiling`` settings. ``ISO_PROFILE``,
+        ``ISO_PROFILE_SAMPLE_RATE`` and ``ISO_PROFILE_TORCH`` override them, so
+        a deployed run can be profiled without editing its config.
+        """
+        rate = os.environ.get('ISO_PROFILE_SAMPLE_RATE')
+        return cls(
+            enabled=_env_flag('ISO_PROFILE', config.profiling_enabled),
+            sample_rate=float(rate) if rate else config.profiling_sample_rate,
+            use_torch=_env_flag('ISO_PROFILE_TORCH', config.profiling_torch),
+            interval_ms=config.profiling_interval_ms,
+        )
+
+    def for_file(self, filename: str):
+        if not self.enabled or self._rng() >= self.sample_rate:
+            return _NoProfile()
+        return FileProfile(self.interval, self.use_torch)
+
+    @staticmethod
+    def write(profile, processed_path: str, out_dir: str = None):
+        """
+        Writes ``profile`` to ``<processed file>.profile/`` in ``out_dir``, or
+        next to ``processed_path`` when it is not set. The flows pass the
+        processed archive, where the processed file ends up.
+        """
+        if isinstance(profile, _NoProfile):
+            return []
+        name = f"{Path(processed_path).name}.profile"
+        target = str(Path(out_dir) / name) if out_dir else f"{processed_path}.profile"
+        written = profile.write(target)
+        if written:
+            try:
+                get_run_logger().info(f"Wrote {len(written)} profile artifacts → {target}")
+            except Exception:
+                pass
+        return written
@@ -0,0 +1,167 @@
+import pandas as pd
+from sqlalchemy import text, bindparam
+from sqlalchemy.exc import IntegrityError
+
+from pipeline.schema import create_address_summary_table, create_latest_view
+
+SUMMARY_TABLE = 'iso_address_summary'
+SUMMARY_KEYS = ('country', 'status', 'filename')
+
+# keeps IN lists well below the bind-parameter limits of SQLite and Postgres
+_LOOKUP_CHUNK = 900
+
+
+def summary_counts(df: pd.DataFrame) -> dict[tuple, int]:
+    """Row counts of ``df`` per (country, status, filename), with '' for missing values."""
+    if df.empty:
+        return {}
+    keys = pd.DataFrame({
+        c: df[c].astype(object).where(df[c].notna(), '').astype(str) if c in df.columns else ''
+        for c in SUMMARY_KEYS
+    }, index=df.index)
+    return {tuple(k): int(n) for k, n in keys.groupby(list(SUMMARY_KEYS)).size().items()}
+
+
+def stored_summary_counts(conn, table_name: str, ids: list[str]) -> dict[tuple, int]:
+    """Row counts per summary group of the stored rows with these ids, read inside ``conn``."""
+    counts: dict[tuple, int] = {}
+    stmt = text(
+        "SELECT COALESCE(country, ''), COALESCE(status, ''), COALESCE(filename, ''), COUNT(*) "
+        f'FROM "{table_name}" WHERE id IN :ids GROUP BY 1, 2, 3'
+    ).bindparams(bindparam('ids', expanding=True))
+    for start in range(0, len(ids), _LOOKUP_CHUNK):
+        for country, status, filename, n in conn.execute(stmt, {'ids': ids[start:start + _LOOKUP_CHUNK]}):
+            key = (country, status, filename)
+            counts[key] = counts.get(key, 0) + n
+    return counts
+
+
+def apply_summary_delta(conn, removed: dict[tuple, int], added: dict[tuple, int]):
+    """
+    Adds ``added - removed`` to the summary rows inside the caller's
+    transaction, so the summary commits together with the rows it counts.
+    Touches one summary row per changed group instead of recounting the table.
+    """
+    delta = dict(added)
+    for key, n in removed.items():
+        delta[key] = delta.get(key, 0) - n
+    update = text(
+        f'UPDATE "{SUMMARY_TABLE}" SET row_count = row_count + :n '
+        'WHERE country = :country AND status = :status AND filename = :filename'
+    )
+    insert = text(
+        f'INSERT INTO "{SUMMARY_TABLE}" (country, status, filename, row_count) '
+        'VALUES (:country, :status, :filename, :n)'
+    )
+    for (country, status, filename), n in delta.items():
+        if n == 0:
+            continue
+        params = {'country': country, 'status': status, 'filename': filename, 'n': n}
+        if conn.execute(update, params).rowcount:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.execute(insert, params)
+        except IntegrityError:
+            # another writer created the group between our UPDATE and INSERT
+            conn.execute(update, params)
+    conn.execute(text(f'DELETE FROM "{SUMMARY_TABLE}" WHERE row_count <= 0'))
+
+
+def ensure_summary_table(engine, table_name: str):
+    """
+    Creates ``iso_address_summary`` if needed, backfilled from the rows of
+    ``table_name`` already stored, so the incremental counts start from them.
+    """
+    if create_address_summary_table(engine):
+        with engine.begin() as conn:
+            rebuild_summary(conn, table_name)
+
+
+def rebuild_summary(conn, table_name: str):
+    """Recounts the whole summary from ``table_name``; used once to backfill an existing table."""
+    conn.execute(text(f'DELETE FROM "{SUMMARY_TABLE}"'))
+    conn.execute(text(
+        f'INSERT INTO "{SUMMARY_TABLE}" (country, status, filename, row_count) '
+        "SELECT COALESCE(country, ''), COALESCE(status, ''), COALESCE(filename, ''), COUNT(*) "
+        f'FROM "{table_name}" GROUP BY 1, 2, 3'
+    ))
+
+
+class AddressQuery:
+    """
+    Read side of ``iso_address``.
+
+    Lookups by id go through the ``(id, record_id)`` index. ``latest`` reads
+    the ``<table>_latest`` view, which keeps the newest row of every id, and
+    ``summary`` reads ``iso_address_summary``, whose counts ``DatabaseRepository.save``
+    keeps current, so dashboards never scan the address table.
+    """
+
+    def __init__(self, engine, table_name: str = 'iso_address'):
+        self.engine = engine
+        self.table_name = table_name
+        ensure_summary_table(self.engine, self.table_name)
+        create_latest_view(self.engine, self.table_name)
+
+    @property
+    def latest_view(self) -> str:
+        return f"{self.table_name}_latest"
+
+    def get(self, address_id: str) -> dict | None:
+        """The latest row of ``address_id``, or None."""
+        with self.engine.connect() as conn:
+            row = conn.execute(text(
+                f'SELECT * FROM "{self.table_name}" WHERE id = :id ORDER BY record_id DESC LIMIT 1'
+            ), {'id': str(address_id)}).mappings().first()
+        return dict(row) if row is not None else None
+
+    def get_many(self, address_ids) -> pd.DataFrame:
+        """
+        The latest row of each id, in chunks of IN-list lookups; missing ids
+        are left out. Reads the base table rather than the view, so both the
+        IN list and the newest-row subquery are index lookups.
+        """
+        ids = list(dict.fromkeys(str(i) for i in address_ids))
+        stmt = text(
+            f'SELECT a.* FROM "{self.table_name}" a WHERE a.id IN :ids '
+            f'AND a.record_id = (SELECT MAX(b.record_id) FROM "{self.table_name}" b WHERE b.id = a.id)'
+        ).bindparams(bindparam('ids', expanding=True))
+        frames = []
+        with self.engine.connect() as conn:
+            for start in range(0, len(ids), _LOOKUP_CHUNK):
+                result = conn.execute(stmt, {'ids': ids[start:start + _LOOKUP_CHUNK]})
+                frames.append(pd.DataFrame(result.fetchall(), columns=list(result.keys())))
+        if not frames:
+            return self._empty_frame()
+        return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+    def latest(self, limit: int | None = None) -> pd.DataFrame:
+        """Rows of the latest-per-id view, ordered by id."""
+        sql = f'SELECT * FROM "{self.latest_view}" ORDER BY id'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(sql), conn)
+
+    def summary(self, by=SUMMARY_KEYS) -> pd.DataFrame:
+        """Row counts grouped by any of country, status and filename."""
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = set(by) - set(SUMMARY_KEYS)
+        if unknown:
+            raise ValueError(f"Cannot summarize by {sorted(unknown)}; choose from {list(SUMMARY_KEYS)}")
+        cols = ', '.join(by)
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(
+                f'SELECT {cols}, SUM(row_count) AS row_count FROM "{SUMMARY_TABLE}" '
+                f'GROUP BY {cols} ORDER BY {cols}'
+            ), conn)
+
+    def rebuild_summary(self):
+        with self.engine.begin() as conn:
+            rebuild_summary(conn, self.table_name)
+
+    def _empty_frame(self) -> pd.DataFrame:
+        with self.engine.connect() as conn:
+            result = conn.execute(text(f'SELECT * FROM "{self.table_name}" WHERE 1 = 0'))
+            return pd.DataFrame(columns=list(result.keys()))
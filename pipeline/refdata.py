@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# File layout (little-endian):
+#   header  : magic (8s) | entries (Q) | values_bytes (Q) | reserved (Q)
+#   hashes  : entries x uint64, sorted ascending
+#   codes   : entries x uint32, index into the values list
+#   values  : UTF-8 JSON list of [region, country] pairs
+_MAGIC = b'ISOREF1\0'
+_HEADER = struct.Struct('<8sQQQ')
+
+
+def normalize_keys(keys) -> pd.Series:
+    """Case-folds, trims and collapses inner whitespace so lookups are forgiving."""
+    s = pd.Series(keys, dtype=object).fillna('').astype(str)
+    return s.str.casefold().str.strip().str.replace(r'\s+', ' ', regex=True)
+
+
+def hash_keys(keys) -> np.ndarray:
+    # pandas' hash_array is vectorized and stable across processes and runs
+    return pd.util.hash_array(normalize_keys(keys).to_numpy(dtype=object), categorize=False)
+
+
+def compile_reference_table(entries, out_path: str) -> int:
+    """
+    Compiles ``entries`` (a DataFrame with key / region / country columns, or
+    an iterable of such tuples) into a read-only lookup file and returns the
+    number of distinct keys written. The first row wins for a repeated key.
+    """
+    df = entries if isinstance(entries, pd.DataFrame) else pd.DataFrame(
+        list(entries), columns=['key', 'region', 'country']
+    )
+    df = df[['key', 'region', 'country']].fillna('')
+
+    hashes = hash_keys(df['key'])
+    order = np.argsort(hashes, kind='stable')
+    hashes = hashes[order]
+    keep = np.ones(len(hashes), dtype=bool)
+    keep[1:] = hashes[1:] != hashes[:-1]
+    order, hashes = order[keep], hashes[keep]
+
+    picked = df.iloc[order]
+    codes, uniques = pd.MultiIndex.from_arrays([
+        picked['region'].astype(str).str.strip(), picked['country'].astype(str).str.strip()
+    ]).factorize()
+    values = json.dumps([list(u) for u in uniques]).encode('utf-8')
+
+    out_path = str(out_path)
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{out_path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(hashes), len(values), 0))
+        f.write(hashes.astype('<u8').tobytes())
+        f.write(codes.astype('<u4').tobytes())
+        f.write(values)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, out_path)
+    return len(hashes)
+
+
+def compile_csv(csv_path: str, out_path: str, key_column: str, region_column: str,
+                country_column: str, chunksize: int = 1_000_000) -> int:
+    chunks = pd.read_csv(
+        csv_path, usecols=[key_column, region_column, country_column], dtype=str,
+        keep_default_na=False, chunksize=chunksize
+    )
+    df = pd.concat(chunks, ignore_index=True).rename(columns={
+        key_column: 'key', region_column: 'region', country_column: 'country'
+    })
+    return compile_reference_table(df, out_path)
+
+
+class ReferenceTable:
+    """
+    Read-only, memory-mapped view of a compiled reference table.
+
+    Opening only maps the file, so it takes milliseconds whatever the size,
+    and every process that opens (or inherits) the same file shares one
+    physical copy through the page cache. Pickling sends just the path.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self._open()
+
+    def _open(self):
+        with open(self.path, 'rb') as f:
+            magic, entries, values_bytes, _ = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{self.path} is not a compiled reference table")
+            f.seek(_HEADER.size + entries * 12)
+            pairs = json.loads(f.read(values_bytes).decode('utf-8'))
+
+        self._size = entries
+        if entries:
+            self._hashes = np.memmap(self.path, dtype='<u8', mode='r', offset=_HEADER.size, shape=(entries,))
+            self._codes = np.memmap(self.path, dtype='<u4', mode='r', offset=_HEADER.size + entries * 8,
+                                    shape=(entries,))
+        else:
+            self._hashes = np.empty(0, dtype='<u8')
+            self._codes = np.empty(0, dtype='<u4')
+        # one trailing '' entry serves as the "not found" value
+        self._regions = np.array([p[0] for p in pairs] + [''], dtype=object)
+        self._countries = np.array([p[1] for p in pairs] + [''], dtype=object)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._open()
+
+    def lookup(self, keys) -> tuple[np.ndarray, np.ndarray]:
+        """Returns (regions, countries) for ``keys``; '' where a key is unknown."""
+        hashes = hash_keys(keys)
+        if not self._size:
+            missing = np.full(len(hashes), '', dtype=object)
+            return missing, missing.copy()
+        pos = np.searchsorted(self._hashes, hashes)
+        pos_clipped = np.minimum(pos, self._size - 1)
+        found = self._hashes[pos_clipped] == hashes
+        codes = np.where(found, self._codes[pos_clipped], len(self._regions) - 1)
+        return self._regions[codes], self._countries[codes]
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compile a CSV gazetteer into a memory-mapped reference table.")
+    p.add_argument("csv", help="Input CSV")
+    p.add_argument("out", help="Output .refdata file")
+    p.add_argument("--key", required=True, help="Key column, e.g. city or postcode")
+    p.add_argument("--region", default="region", help="Region/state column")
+    p.add_argument("--country", default="country", help="ISO country column")
+    args = p.parse_args()
+
+    n = compile_csv(args.csv, args.out, args.key, args.region, args.country)
+    print(f"Compiled {n:,} keys → {args.out}")
+
+
+if __name__ == "__main__":
+    main()
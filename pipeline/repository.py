@@ -1,29 +1,59 @@
+import time
 import pandas as pd
 from sqlalchemy import create_engine, text, bindparam
 from pipeline.schema import create_iso_address_table
+from pipeline.query import apply_summary_delta, ensure_summary_table, stored_summary_counts, summary_counts
 from pipeline.config import Config
+from pipeline.tuning import AdaptiveBatchSizer
 
 
 class DatabaseRepository:
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, chunk_sizer: AdaptiveBatchSizer = None):
+        self.chunk_sizer = chunk_sizer
         self.engine = create_engine(config.database_url)
         self.table_name = config.table_name
         create_iso_address_table(self.engine)
+        ensure_summary_table(self.engine, self.table_name)
 
-    def save(self, data_frame: pd.DataFrame, batch_size: int = 1000):
+    def save(self, data_frame: pd.DataFrame, batch_size: int = 1000, on_commit=None):
+        """
+        Replaces the rows of every id in ``data_frame`` in one transaction.
+        ``on_commit(conn)`` runs inside that transaction, so bookkeeping such
+        as a chunk checkpoint commits together with the rows, or not at all.
+        The ``iso_address_summary`` counts are adjusted in the same transaction.
+        """
         df = data_frame.rename(columns={"ID": "id"})
         ids = [str(i) for i in df['id'].dropna().unique()]
-        if ids:
-            delete_stmt = (
-                text(f'DELETE FROM "{self.table_name}" WHERE id IN :ids')
-                .bindparams(bindparam("ids", expanding=True))
-            )
-            with self.engine.begin() as conn:
+        with self.engine.begin() as conn:
+            removed = {}
+            if ids:
+                removed = stored_summary_counts(conn, self.table_name, ids)
+                delete_stmt = (
+                    text(f'DELETE FROM "{self.table_name}" WHERE id IN :ids')
+                    .bindparams(bindparam("ids", expanding=True))
+                )
                 conn.execute(delete_stmt, {"ids": ids})
 
+            if self.chunk_sizer is None:
+                self._insert(conn, df, batch_size)
+            else:
+                # one INSERT per chunk, each timed so the sizer can adjust the next one
+                start = 0
+                while start < len(df):
+                    chunk = df.iloc[start:start + self.chunk_sizer.size]
+                    began = time.perf_counter()
+                    self._insert(conn, chunk, len(chunk))
+                    self.chunk_sizer.record(len(chunk), time.perf_counter() - began)
+                    start += len(chunk)
+
+            apply_summary_delta(conn, removed, summary_counts(df))
+            if on_commit is not None:
+                on_commit(conn)
+
+    def _insert(self, conn, df: pd.DataFrame, batch_size: int):
         df.to_sql(
             name=self.table_name,
-            con=self.engine,
+            con=conn,
             if_exists='append',
             index=False,
             method='multi',
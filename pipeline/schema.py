@@ -1,9 +1,9 @@
-from sqlalchemy import MetaData, Table, Column, Integer, String
+from sqlalchemy import MetaData, Table, Column, Index, Integer, String, Float, UniqueConstraint, inspect, text
 
 
 def create_iso_address_table(engine):
     metadata = MetaData()
-    Table(
+    table = Table(
         'iso_address', metadata,
         Column('record_id', Integer, primary_key=True, autoincrement=True),
         Column('id', String(36)),
@@ -18,5 +18,97 @@ def create_iso_address_table(engine):
         Column('processed_timestamp', String(32)),
         Column('extracted_by', String(50)),
         Column('status', String(16), nullable=False),
+        Column('confidence', Float),
+        Index('ix_iso_address_id', 'id', 'record_id'),
+    )
+    metadata.create_all(engine)
+    _add_missing_columns(engine, table)
+    _add_missing_indexes(engine, table)
+
+
+def _add_missing_columns(engine, table):
+    # tables created by an older release predate the nullable columns added since
+    existing = {c['name'] for c in inspect(engine).get_columns(table.name)}
+    missing = [c for c in table.columns if c.name not in existing and c.nullable]
+    if not missing:
+        return
+    with engine.begin() as conn:
+        for column in missing:
+            conn.execute(text(
+                f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column.type.compile(engine.dialect)}'
+            ))
+
+
+def _add_missing_indexes(engine, table):
+    existing = {i['name'] for i in inspect(engine).get_indexes(table.name)}
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(engine)
+
+
+def create_address_summary_table(engine) -> bool:
+    """Creates ``iso_address_summary`` if needed; returns True when it was just created."""
+    if inspect(engine).has_table('iso_address_summary'):
+        return False
+    metadata = MetaData()
+    Table(
+        'iso_address_summary', metadata,
+        Column('summary_id', Integer, primary_key=True, autoincrement=True),
+        # '' stands for NULL so the unique constraint covers every group
+        Column('country', String(6), nullable=False),
+        Column('status', String(16), nullable=False),
+        Column('filename', String(255), nullable=False),
+        Column('row_count', Integer, nullable=False),
+        UniqueConstraint('country', 'status', 'filename', name='uq_iso_address_summary_group'),
+    )
+    metadata.create_all(engine)
+    return True
+
+
+def create_latest_view(engine, table_name: str = 'iso_address'):
+    """``<table>_latest``: the most recently inserted row of every id."""
+    view = f"{table_name}_latest"
+    if view in inspect(engine).get_view_names():
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            f'CREATE VIEW "{view}" AS '
+            f'SELECT a.* FROM "{table_name}" a '
+            f'JOIN (SELECT id, MAX(record_id) AS record_id FROM "{table_name}" GROUP BY id) latest '
+            'ON a.record_id = latest.record_id'
+        ))
+
+
+def create_work_queue_table(engine):
+    metadata = MetaData()
+    Table(
+        'iso_work_queue', metadata,
+        Column('task_id', Integer, primary_key=True, autoincrement=True),
+        Column('filename', String(255), nullable=False),
+        Column('row_start', Integer, nullable=False),
+        Column('row_end', Integer, nullable=False),
+        Column('status', String(16), nullable=False),
+        Column('owner', String(100)),
+        Column('lease_expires', Float),
+        Column('heartbeat_at', Float),
+        Column('attempts', Integer, nullable=False, default=0),
+        UniqueConstraint('filename', 'row_start', name='uq_iso_work_queue_shard'),
+    )
+    metadata.create_all(engine)
+
+
+def create_checkpoint_table(engine):
+    metadata = MetaData()
+    Table(
+        'iso_checkpoint', metadata,
+        Column('checkpoint_id', Integer, primary_key=True, autoincrement=True),
+        Column('file_key', String(64), nullable=False),
+        Column('filename', String(255), nullable=False),
+        Column('source', String(255), nullable=False),
+        Column('processed_timestamp', String(32), nullable=False),
+        Column('row_start', Integer, nullable=False),
+        Column('row_end', Integer, nullable=False),
+        Column('committed_at', Float, nullable=False),
+        UniqueConstraint('file_key', 'row_start', name='uq_iso_checkpoint_chunk'),
     )
     metadata.create_all(engine)
@@ -0,0 +1,253 @@
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.config import Config
+from pipeline.parser import AddressParserService
+
+_REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error',
+}
+
+_MAX_BODY = 16 * 1024 * 1024
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single requests into one call of ``handler``.
+
+    A batch is flushed as soon as it holds ``max_batch_size`` items or the
+    oldest item has waited ``max_latency_ms``, whichever comes first. If the
+    handler raises on a batch, its items are retried one at a time, so only
+    the requests that fail on their own get the error.
+    """
+
+    def __init__(self, handler, max_batch_size: int = 64, max_latency_ms: float = 10.0):
+        self._handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        # the model is not thread-safe, so all batches share one worker thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='parse-batch')
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def run_batch(self, items: list):
+        """Runs an already-formed batch on the model thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._handler, items)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = loop.time() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = await self.run_batch(items)
+            except Exception as exc:
+                if len(batch) == 1:
+                    self._settle(batch[0][1], exc=exc)
+                    continue
+                # retry one by one, so a bad request fails alone instead of with its whole batch
+                for item, future in batch:
+                    try:
+                        self._settle(future, result=(await self.run_batch([item]))[0])
+                    except Exception as item_exc:
+                        self._settle(future, exc=item_exc)
+                continue
+            for (_, future), result in zip(batch, results):
+                self._settle(future, result=result)
+
+    @staticmethod
+    def _settle(future: asyncio.Future, result=None, exc: Exception = None):
+        # the caller may have gone away (cancelled) while its batch ran
+        if future.done():
+            return
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+
+class ParsingService:
+    """
+    Minimal asyncio HTTP/1.1 front end for ``AddressParserService``.
+
+    Routes:
+        GET  /health      -> {"status": "ok"}
+        POST /parse       -> one address object, micro-batched with other callers
+        POST /parse/batch -> a list of address objects, parsed as one batch
+    """
+
+    def __init__(self, parser_svc: AddressParserService, host: str = '127.0.0.1', port: int = 8080,
+                 max_batch_size: int = 64, max_latency_ms: float = 10.0):
+        self.parser_svc = parser_svc
+        self.host = host
+        self.port = port
+        self.batcher = MicroBatcher(self._parse_items, max_batch_size, max_latency_ms)
+        self._server: asyncio.AbstractServer | None = None
+
+    def _parse_items(self, items: list[dict]) -> list[dict]:
+        rows = [{k: ('' if v is None else v) for k, v in item.items()} for item in items]
+        result_df = self.parser_svc.parse(rows, source='service')
+        result_df = result_df.astype(object).where(result_df.notna(), None)
+        return result_df.to_dict(orient='records')
+
+    async def start(self):
+        await self.batcher.start()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, keep_alive=False)
+                    break
+                if length > _MAX_BODY:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                status, payload = await self._dispatch(method.upper(), path.split('?', 1)[0], body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> tuple[int, object]:
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, {'status': 'ok'}
+        if path not in ('/parse', '/parse/batch'):
+            return 404, {'error': f'unknown path {path}'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        try:
+            payload = json.loads(body or b'null')
+        except ValueError:
+            return 400, {'error': 'body is not valid JSON'}
+
+        started = time.perf_counter()
+        try:
+            if path == '/parse':
+                if not isinstance(payload, dict):
+                    return 400, {'error': 'expected a JSON object'}
+                result = await self.batcher.submit(payload)
+                return 200, result
+
+            if isinstance(payload, dict):
+                payload = payload.get('addresses')
+            if not isinstance(payload, list) or not all(isinstance(p, dict) for p in payload):
+                return 400, {'error': 'expected a JSON list of objects'}
+            results = await self.batcher.run_batch(payload) if payload else []
+            return 200, {
+                'results': results,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 3),
+            }
+        except Exception as exc:
+            return 500, {'error': str(exc)}
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool = True):
+        body = json.dumps(payload, default=str).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serve address parsing over HTTP.")
+    p.add_argument("--config", "-c", type=str, default=None, help="Path to config.yml")
+    args = p.parse_args()
+
+    config = Config(path=args.config) if args.config else Config()
+    service = ParsingService(
+        AddressParserService.from_config(config),
+        host=config.service_host,
+        port=config.service_port,
+        max_batch_size=config.service_max_batch_size,
+        max_latency_ms=config.service_max_latency_ms,
+    )
+    print(f"Serving address parsing on http://{config.service_host}:{config.service_port}")
+    asyncio.run(service.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import logging
+import os
+import sys
+
+from prefect import get_run_logger
+
+_log = logging.getLogger(__name__)
+
+
+def current_rss_mb() -> float:
+    """Resident set size of this process in MiB."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        # peak rather than current RSS, but the best portable fallback;
+        # ru_maxrss is KiB on Linux and bytes on macOS; resource is Unix-only
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+class AdaptiveBatchSizer:
+    """
+    Picks the next batch size from how the previous batches went.
+
+    After each batch, ``record`` updates a smoothed per-row latency and aims
+    the next batch at ``target_seconds``, moving at most 2x per step and
+    staying within ``[min_size, max_size]``. Whenever process RSS is above
+    90% of ``memory_limit_mb`` the size is halved, and above 75% it may not
+    grow. Every change is logged with the measurements behind it and kept in
+    ``history``, so a run's choices can be replayed as fixed sizes.
+    """
+
+    def __init__(self, name: str, initial: int, min_size: int, max_size: int,
+                 target_seconds: float = 1.0, memory_limit_mb: float = None,
+                 smoothing: float = 0.3, rss_probe=current_rss_mb):
+        if not 0 < min_size <= initial <= max_size:
+            raise ValueError(f"{name}: need 0 < min_size <= initial <= max_size")
+        self.name = name
+        self.size = initial
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.smoothing = smoothing
+        self.seconds_per_row = None
+        self.history: list[dict] = []
+        self._rss_probe = rss_probe
+
+    def record(self, rows: int, seconds: float) -> int:
+        """Feeds back one finished batch and returns the size to use next."""
+        if rows <= 0:
+            return self.size
+        observed = seconds / rows
+        if self.seconds_per_row is None:
+            self.seconds_per_row = observed
+        else:
+            self.seconds_per_row += self.smoothing * (observed - self.seconds_per_row)
+
+        wanted = self.target_seconds / self.seconds_per_row if self.seconds_per_row > 0 else self.max_size
+        wanted = min(max(wanted, self.size / 2), self.size * 2)
+
+        rss = self._rss_probe()
+        reason = 'latency'
+        if self.memory_limit_mb:
+            if rss > 0.9 * self.memory_limit_mb:
+                wanted, reason = self.size / 2, 'memory ceiling'
+            elif rss > 0.75 * self.memory_limit_mb and wanted > self.size:
+                wanted, reason = self.size, 'memory headroom'
+
+        new_size = int(min(max(wanted, self.min_size), self.max_size))
+        self.history.append({
+            'rows': rows, 'seconds': round(seconds, 6), 'rss_mb': round(rss, 1),
+            'size': self.size, 'next_size': new_size, 'reason': reason,
+        })
+        if new_size != self.size:
+            self._log(
+                f"{self.name}: batch size {self.size} -> {new_size} ({reason}; "
+                f"{self.seconds_per_row * 1000:.3f} ms/row, rss {rss:.0f} MB)"
+            )
+            self.size = new_size
+        return self.size
+
+    @staticmethod
+    def _log(message: str):
+        try:
+            get_run_logger().info(message)
+        except Exception:
+            _log.info(message)
@@ -0,0 +1,202 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from collections.abc import Iterator
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _Inotify:
+    """Thin ctypes binding over the Linux inotify syscalls."""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY | _IN_DELETE | _IN_MOVED_FROM
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout: float) -> list[tuple[int, str]]:
+        """``(mask, name)`` of each event; queue overflows come with an empty name."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b'\0')
+            offset += length
+            events.append((mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """
+    Yields Excel files as they land in ``directory``.
+
+    Uses inotify on Linux and falls back to polling every ``poll_interval``
+    seconds elsewhere (or when ``use_inotify`` is off). A file is only yielded
+    once its size and mtime have not changed for ``settle_seconds``, so files
+    still being copied in are never handed out half-written. Each file is
+    yielded once; if it is removed (archived) and dropped again it is
+    picked up again. In inotify mode the directory is still rescanned every
+    ``poll_interval`` seconds, and after an event-queue overflow, so missed
+    events cannot hide a file. A file whose processing failed is handed to
+    ``retry``; it is yielded again after ``retry_backoff`` seconds, doubling
+    with each further failure up to ``max_retry_backoff``.
+    """
+
+    SUFFIXES = ('.xls', '.xlsx')
+
+    def __init__(self, directory: str, poll_interval: float = 2.0, settle_seconds: float = 2.0,
+                 use_inotify: bool = True, retry_backoff: float = 5.0, max_retry_backoff: float = 300.0):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.use_inotify = use_inotify and sys.platform.startswith('linux')
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self._stop = threading.Event()
+        self._pending: dict[str, tuple[int, int, float]] = {}
+        # name -> (size, mtime_ns) when it was handed out
+        self._seen: dict[str, tuple[int, int]] = {}
+        # name -> failed attempts, and when the next attempt is due
+        self._failures: dict[str, int] = {}
+        self._retry_at: dict[str, float] = {}
+
+    def stop(self):
+        self._stop.set()
+
+    def retry(self, name: str):
+        """Yields ``name`` again after a backoff, even if it has not changed."""
+        failures = self._failures.get(name, 0) + 1
+        self._failures[name] = failures
+        delay = min(self.retry_backoff * 2 ** (failures - 1), self.max_retry_backoff)
+        self._retry_at[name] = time.monotonic() + delay
+
+    def __iter__(self) -> Iterator[str]:
+        return self.watch()
+
+    def watch(self) -> Iterator[str]:
+        inotify = None
+        if self.use_inotify:
+            try:
+                inotify = _Inotify(self.directory)
+            except (OSError, AttributeError):
+                inotify = None
+
+        try:
+            self._scan()
+            next_scan = time.monotonic() + self.poll_interval
+            while not self._stop.is_set():
+                self._due_retries()
+                yield from self._ready()
+                # while files are settling, wake up often enough to notice
+                wait = min(self.poll_interval, self.settle_seconds / 2) if self._pending else self.poll_interval
+                if self._retry_at:
+                    wait = max(0.0, min(wait, min(self._retry_at.values()) - time.monotonic()))
+                if inotify is not None:
+                    for mask, name in inotify.read(wait):
+                        if mask & _IN_Q_OVERFLOW:
+                            self._scan()
+                        elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                            self._forget(name)
+                        else:
+                            self._consider(name)
+                    if time.monotonic() >= next_scan:
+                        self._scan()
+                        next_scan = time.monotonic() + self.poll_interval
+                else:
+                    self._stop.wait(wait)
+                    self._scan()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _is_candidate(self, name: str) -> bool:
+        # skip hidden/temp files and Excel's "~$name.xlsx" lock files
+        return name.lower().endswith(self.SUFFIXES) and not name.startswith(('.', '~$'))
+
+    def _scan(self):
+        present = set()
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and self._is_candidate(entry.name):
+                    present.add(entry.name)
+                    self._consider(entry.name)
+        self._seen = {n: v for n, v in self._seen.items() if n in present}
+        self._failures = {n: v for n, v in self._failures.items() if n in present}
+        self._retry_at = {n: v for n, v in self._retry_at.items() if n in present}
+
+    def _forget(self, name: str):
+        self._seen.pop(name, None)
+        self._pending.pop(name, None)
+        self._failures.pop(name, None)
+        self._retry_at.pop(name, None)
+
+    def _due_retries(self):
+        now = time.monotonic()
+        for name in [n for n, due in self._retry_at.items() if due <= now]:
+            del self._retry_at[name]
+            # no longer counts as handled, so it settles and is yielded like a new drop
+            self._seen.pop(name, None)
+            self._consider(name)
+
+    def _consider(self, name: str):
+        if not self._is_candidate(name):
+            return
+        try:
+            st = os.stat(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            self._pending.pop(name, None)
+            return
+        if self._seen.get(name) == (st.st_size, st.st_mtime_ns):
+            return
+        previous = self._pending.get(name)
+        if previous is None or previous[:2] != (st.st_size, st.st_mtime_ns):
+            self._pending[name] = (st.st_size, st.st_mtime_ns, time.monotonic())
+
+    def _ready(self) -> Iterator[str]:
+        now = time.monotonic()
+        for name in sorted(self._pending):
+            # re-stat so writes that raised no event (e.g. on NFS) reset the timer
+            self._consider(name)
+            state = self._pending.get(name)
+            if state is None or now - state[2] < self.settle_seconds:
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb'):
+                    pass
+            except OSError:
+                continue
+            size, mtime_ns, _ = self._pending.pop(name)
+            self._seen[name] = (size, mtime_ns)
+            yield name
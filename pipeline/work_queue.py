@@ -0,0 +1,201 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from pipeline.schema import create_work_queue_table
+
+QUEUE_TABLE = 'iso_work_queue'
+
+PENDING = 'PENDING'
+CLAIMED = 'CLAIMED'
+DONE = 'DONE'
+FAILED = 'FAILED'
+ARCHIVING = 'ARCHIVING'
+ARCHIVED = 'ARCHIVED'
+
+# dialects that understand SELECT ... FOR UPDATE SKIP LOCKED
+_SKIP_LOCKED_DIALECTS = ('postgresql', 'mysql', 'mariadb', 'oracle')
+
+
+@dataclass(frozen=True)
+class Shard:
+    task_id: int
+    filename: str
+    row_start: int
+    row_end: int
+    attempts: int
+
+
+class WorkQueue:
+    """
+    Database-backed queue of row-range shards, shared by workers on any host.
+
+    Workers ``claim`` a shard under a lease of ``lease_seconds``, keep it alive
+    with ``heartbeat`` and ``complete`` it once its rows are committed. A lease
+    that runs out (the worker died) makes the shard claimable again, until it
+    has been tried ``max_attempts`` times and is marked FAILED.
+
+    On PostgreSQL the candidate row is picked with ``FOR UPDATE SKIP LOCKED``;
+    every claim is also a compare-and-set UPDATE, which is what keeps SQLite
+    (used in tests) from handing one shard to two workers.
+    """
+
+    def __init__(self, engine, lease_seconds: float = 300, max_attempts: int = 3, clock=time.time):
+        self.engine = engine
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._clock = clock
+        create_work_queue_table(self.engine)
+
+    def enqueue_file(self, filename: str, total_rows: int, shard_rows: int) -> int:
+        """
+        Adds the shards of ``filename`` unless they are already queued and
+        returns how many were added. A file whose previous drop was fully
+        archived is queued afresh.
+        """
+        with self.engine.begin() as conn:
+            statuses = {r[0] for r in conn.execute(
+                text(f'SELECT DISTINCT status FROM "{QUEUE_TABLE}" WHERE filename = :f'), {'f': filename}
+            )}
+            if statuses and statuses != {ARCHIVED}:
+                return 0
+            if statuses:
+                conn.execute(text(f'DELETE FROM "{QUEUE_TABLE}" WHERE filename = :f'), {'f': filename})
+
+        shards = [
+            {'f': filename, 's': start, 'e': min(start + shard_rows, total_rows), 'st': PENDING}
+            for start in range(0, max(total_rows, 1), shard_rows)
+        ]
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(text(
+                    f'INSERT INTO "{QUEUE_TABLE}" (filename, row_start, row_end, status, attempts) '
+                    f'VALUES (:f, :s, :e, :st, 0)'
+                ), shards)
+        except IntegrityError:
+            # another worker queued the same file first
+            return 0
+        return len(shards)
+
+    def claim(self, worker_id: str) -> Shard | None:
+        skip_locked = ' FOR UPDATE SKIP LOCKED' if self.engine.dialect.name in _SKIP_LOCKED_DIALECTS else ''
+        while True:
+            now = self._clock()
+            with self.engine.begin() as conn:
+                row = conn.execute(text(
+                    f'SELECT task_id, filename, row_start, row_end, attempts FROM "{QUEUE_TABLE}" '
+                    f'WHERE status = :pending OR (status = :claimed AND lease_expires < :now) '
+                    f'ORDER BY task_id LIMIT 1{skip_locked}'
+                ), {'pending': PENDING, 'claimed': CLAIMED, 'now': now}).first()
+                if row is None:
+                    return None
+
+                task_id, filename, row_start, row_end, attempts = row
+                if attempts >= self.max_attempts:
+                    conn.execute(text(
+                        f'UPDATE "{QUEUE_TABLE}" SET status = :failed, owner = NULL '
+                        f'WHERE task_id = :id AND attempts = :attempts'
+                    ), {'failed': FAILED, 'id': task_id, 'attempts': attempts})
+                    continue
+
+                claimed = conn.execute(text(
+                    f'UPDATE "{QUEUE_TABLE}" SET status = :claimed, owner = :owner, '
+                    f'lease_expires = :lease, heartbeat_at = :now, attempts = attempts + 1 '
+                    f'WHERE task_id = :id AND attempts = :attempts '
+                    f'AND (status = :pending OR (status = :claimed AND lease_expires < :now))'
+                ), {
+                    'claimed': CLAIMED, 'pending': PENDING, 'owner': worker_id,
+                    'lease': now + self.lease_seconds, 'now': now, 'id': task_id, 'attempts': attempts,
+                }).rowcount
+            if claimed == 1:
+                return Shard(task_id, filename, row_start, row_end, attempts + 1)
+
+    def heartbeat(self, shard: Shard, worker_id: str) -> bool:
+        """Extends the lease; False means it was lost to another worker."""
+        now = self._clock()
+        with self.engine.begin() as conn:
+            return conn.execute(text(
+                f'UPDATE "{QUEUE_TABLE}" SET lease_expires = :lease, heartbeat_at = :now '
+                f'WHERE task_id = :id AND owner = :owner AND status = :claimed'
+            ), {
+                'lease': now + self.lease_seconds, 'now': now, 'id': shard.task_id,
+                'owner': worker_id, 'claimed': CLAIMED,
+            }).rowcount == 1
+
+    def complete(self, shard: Shard, worker_id: str) -> bool:
+        with self.engine.begin() as conn:
+            return conn.execute(text(
+                f'UPDATE "{QUEUE_TABLE}" SET status = :done, lease_expires = NULL '
+                f'WHERE task_id = :id AND owner = :owner AND status = :claimed'
+            ), {'done': DONE, 'id': shard.task_id, 'owner': worker_id, 'claimed': CLAIMED}).rowcount == 1
+
+    def fail(self, shard: Shard, worker_id: str):
+        """Gives the shard back right away, or marks it FAILED once out of attempts."""
+        status = FAILED if shard.attempts >= self.max_attempts else PENDING
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f'UPDATE "{QUEUE_TABLE}" SET status = :status, owner = NULL, lease_expires = NULL '
+                f'WHERE task_id = :id AND owner = :owner AND status = :claimed'
+            ), {'status': status, 'id': shard.task_id, 'owner': worker_id, 'claimed': CLAIMED})
+
+    def begin_archive(self, filename: str) -> bool:
+        """
+        True for exactly one caller once every shard of ``filename`` is DONE;
+        that caller archives the file and then calls ``end_archive``.
+        """
+        with self.engine.begin() as conn:
+            unfinished = conn.execute(text(
+                f'SELECT COUNT(*) FROM "{QUEUE_TABLE}" WHERE filename = :f AND status <> :done'
+            ), {'f': filename, 'done': DONE}).scalar()
+            if unfinished:
+                return False
+            return conn.execute(text(
+                f'UPDATE "{QUEUE_TABLE}" SET status = :archiving WHERE filename = :f AND status = :done'
+            ), {'archiving': ARCHIVING, 'f': filename, 'done': DONE}).rowcount > 0
+
+    def end_archive(self, filename: str):
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                f'UPDATE "{QUEUE_TABLE}" SET status = :archived WHERE filename = :f AND status = :archiving'
+            ), {'archived': ARCHIVED, 'f': filename, 'archiving': ARCHIVING})
+
+    def counts(self) -> dict[str, int]:
+        with self.engine.begin() as conn:
+            return dict(conn.execute(text(
+                f'SELECT status, COUNT(*) FROM "{QUEUE_TABLE}" GROUP BY status'
+            )).all())
+
+
+class Heartbeat:
+    """Renews a shard's lease in the background while it is being processed."""
+
+    def __init__(self, queue: WorkQueue, shard: Shard, worker_id: str, interval: float = None):
+        self.queue = queue
+        self.shard = shard
+        self.worker_id = worker_id
+        self.interval = interval or max(queue.lease_seconds / 3, 0.05)
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f'heartbeat-{shard.task_id}')
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                if not self.queue.heartbeat(self.shard, self.worker_id):
+                    self.lost = True
+                    return
+            except Exception:
+                # a transient DB error is retried at the next beat
+                continue
@@ -0,0 +1,185 @@
+import os
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.archiver import _fsync_dir
+
+OUTPUT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+
+def output_path(processed_dir: str, source: str, ts: str, output_format: str = None) -> str:
+    """``<processed_dir>/<stem>_<ts><ext>``; the extension of ``source`` unless ``output_format`` is set."""
+    stem, ext = Path(source).stem, Path(source).suffix
+    if output_format:
+        ext = f".{output_format}"
+    safe_ts = ts.replace('-', '').replace(':', '')
+    return str(Path(processed_dir) / f"{stem}_{safe_ts}{ext}")
+
+
+def open_writer(path: str) -> 'ChunkWriter':
+    """A writer for ``path``, chosen by its extension."""
+    fmt = Path(path).suffix.lower().lstrip('.')
+    if fmt not in _WRITERS:
+        raise ValueError(f"Cannot write {path!r}; expected one of {OUTPUT_FORMATS}")
+    return _WRITERS[fmt](path)
+
+
+class ChunkWriter(ABC):
+    """
+    Appends DataFrame chunks to one output file as they are produced.
+
+    Rows go to a hidden temp file next to ``path``. ``close`` finalizes the
+    file and renames it into place, so ``path`` either does not exist or
+    holds the complete output. ``abort`` (or leaving the ``with`` block on
+    an exception) removes the temp file. Only the chunk being written is
+    held in memory, and nothing is re-serialized at the end.
+    """
+
+    def __init__(self, path: str):
+        self.path = str(path)
+        self.rows = 0
+        self.tmp_path = os.path.join(
+            os.path.dirname(self.path) or '.', f".{os.path.basename(self.path)}.{uuid.uuid4().hex}.tmp"
+        )
+        self._closed = False
+
+    def write(self, df: pd.DataFrame):
+        if self._closed:
+            raise ValueError(f"{self.path} is already closed")
+        self._write(df)
+        self.rows += len(df)
+
+    def close(self) -> str:
+        if not self._closed:
+            self._closed = True
+            self._finish()
+            with open(self.tmp_path, 'rb+') as f:
+                os.fsync(f.fileno())
+            os.replace(self.tmp_path, self.path)
+            _fsync_dir(os.path.dirname(self.path) or '.')
+        return self.path
+
+    def abort(self):
+        if not self._closed:
+            self._closed = True
+            try:
+                self._discard()
+            finally:
+                try:
+                    os.remove(self.tmp_path)
+                except FileNotFoundError:
+                    pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    @abstractmethod
+    def _write(self, df: pd.DataFrame):
+        """Appends ``df`` to the temp file."""
+
+    @abstractmethod
+    def _finish(self):
+        """Completes the temp file; it is fsynced and renamed afterwards."""
+
+    def _discard(self):
+        pass
+
+
+class CsvChunkWriter(ChunkWriter):
+    """Appends each chunk to an open CSV file; the header comes from the first chunk."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        self._header = True
+
+    def _write(self, df: pd.DataFrame):
+        df.to_csv(self._file, index=False, header=self._header)
+        self._header = False
+
+    def _finish(self):
+        self._file.close()
+
+    def _discard(self):
+        self._file.close()
+
+
+class ParquetChunkWriter(ChunkWriter):
+    """
+    Writes each chunk as a Parquet row group. The schema is taken from the
+    first chunk; categorical columns are stored as dictionaries, whose
+    categories may differ from chunk to chunk.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._writer = None
+        self._schema = None
+
+    def _write(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            # later chunks may have more categories than the first one's index type holds
+            for i, field in enumerate(schema):
+                if pa.types.is_dictionary(field.type):
+                    schema = schema.set(i, field.with_type(pa.dictionary(pa.int32(), field.type.value_type)))
+            self._schema = schema
+            self._writer = pq.ParquetWriter(self.tmp_path, schema)
+        self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+
+    def _finish(self):
+        if self._writer is None:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table({}), self.tmp_path)
+        else:
+            self._writer.close()
+
+    def _discard(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class XlsxChunkWriter(ChunkWriter):
+    """
+    Appends rows to an openpyxl write-only workbook. openpyxl streams the
+    rows of a write-only sheet to a temp file as they are appended, so
+    memory stays flat; ``close`` only zips the finished parts together.
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        from openpyxl import Workbook
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._header = True
+
+    def _write(self, df: pd.DataFrame):
+        if self._header:
+            self._sheet.append([str(c) for c in df.columns])
+            self._header = False
+        values = df.astype(object).where(df.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            self._sheet.append(row)
+
+    def _finish(self):
+        self._workbook.save(self.tmp_path)
+
+    def _discard(self):
+        self._workbook.close()
+
+
+_WRITERS = {'csv': CsvChunkWriter, 'parquet': ParquetChunkWriter, 'xlsx': XlsxChunkWriter}
@@ -0,0 +1,397 @@
+import contextlib
+import os
+import posixpath
+import re
+import zipfile
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_NS = {'m': _MAIN_NS}
+
+# the only elements inside <sheetData> are <row>s, and '<' never appears
+# unescaped in XML text, so every match is a row boundary
+_ROW_START = re.compile(rb'<row[\s>]')
+_ROW_NUMBER = re.compile(rb'\sr="(\d+)"')
+_CELL_REF = re.compile(r'([A-Z]+)(\d*)')
+
+DEFAULT_SHARD_BYTES = 8 * 2 ** 20
+DEFAULT_BLOCK_BYTES = 2 ** 20
+
+# set in each worker process by _init_worker
+_shared_strings: list[str] = []
+_date_styles: dict[int, bool] = {}
+_epoch = CALENDAR_WINDOWS_1900
+
+
+def read_xlsx(path: str, columns: list[str] = None, workers: int = None,
+              shard_bytes: int = DEFAULT_SHARD_BYTES) -> pd.DataFrame:
+    """Reads the first sheet of ``path`` into one DataFrame; see ``read_xlsx_chunks``."""
+    header, rows = None, []
+    for header, shard_rows in _iter_shard_rows(path, workers, shard_bytes):
+        rows.extend(shard_rows)
+    if header is None:
+        return pd.DataFrame(columns=columns or [])
+    # one frame from all rows, so every column's dtype is inferred over the whole sheet
+    return _to_frame(header, rows, columns)
+
+
+def read_xlsx_chunks(path: str, columns: list[str] = None, workers: int = None,
+                     shard_bytes: int = DEFAULT_SHARD_BYTES) -> Iterator[pd.DataFrame]:
+    """
+    Reads the first sheet of ``path`` in parallel and yields it in row order,
+    one DataFrame per shard, with the first row as the header.
+
+    The sheet XML is decompressed once and cut at ``<row`` boundaries into
+    shards of about ``shard_bytes``, which a process pool parses. Every worker
+    receives the shared-strings table and the date styles once, when it
+    starts. Only ``columns`` (header names) are kept when given. Values follow
+    ``pandas.read_excel``: date-formatted numbers become datetimes, empty
+    cells are NaN, and blank rows between data rows are kept as all-NaN rows
+    (trailing blank rows are dropped).
+    """
+    offset = 0
+    for header, rows in _iter_shard_rows(path, workers, shard_bytes):
+        df = _to_frame(header, rows, columns)
+        df.index = range(offset, offset + len(df))
+        offset += len(df)
+        yield df
+
+
+def count_xlsx_rows(path: str, block_bytes: int = DEFAULT_BLOCK_BYTES) -> int:
+    """
+    Number of data rows ``read_xlsx`` would return, counted from the rows
+    themselves rather than the sheet's ``<dimension>``, which writers may
+    leave stale or omit. Only the header and, per block, the rows from its
+    end back to its last non-blank one are parsed.
+    """
+    header_row = last_row = None
+    previous = 0
+    with _sheet_blocks(path, block_bytes) as blocks:
+        for block in blocks:
+            starts = [m.start() for m in _ROW_START.finditer(block)]
+            if header_row is None:
+                parsed = _parse_shard(block)
+                if parsed:
+                    header_row = parsed[0][0] or previous + 1
+            if header_row is not None:
+                bounds = starts + [len(block)]
+                for i in reversed(range(len(starts))):
+                    if _parse_shard(block[bounds[i]:bounds[i + 1]]):
+                        last_row = _row_number_at(block, bounds[i]) or previous + i + 1
+                        break
+            previous = _last_row_number(block, previous)
+    return last_row - header_row if header_row is not None else 0
+
+
+def read_xlsx_rows(path: str, row_start: int, row_end: int, columns: list[str] = None,
+                   block_bytes: int = DEFAULT_BLOCK_BYTES) -> pd.DataFrame:
+    """
+    Reads data rows [row_start, row_end) (0-based, header excluded) of the
+    first sheet, with the same values as ``read_xlsx``.
+
+    The sheet is decompressed in ``block_bytes`` blocks of whole rows. Blocks
+    that end before ``row_start`` are skipped by the row number of their last
+    row, without being parsed, and reading stops after ``row_end``. Deflate
+    streams cannot be entered midway, so reaching a shard still costs a
+    decompression pass over the rows before it, but no XML parsing.
+    """
+    with _sheet_blocks(path, block_bytes) as blocks:
+        return _read_range(blocks, row_start, row_end, columns)
+
+
+@contextlib.contextmanager
+def _sheet_blocks(path: str, block_bytes: int):
+    """Raw row blocks of the first sheet, with the workbook's lookup tables loaded in this process."""
+    with zipfile.ZipFile(path) as zf:
+        _init_worker(_read_shared_strings(zf), _read_date_styles(zf), _read_epoch(zf))
+        try:
+            yield _raw_row_blocks(zf, _first_sheet_path(zf), block_bytes)
+        finally:
+            _init_worker([], {}, CALENDAR_WINDOWS_1900)
+
+
+def _read_range(blocks: Iterator[bytes], row_start: int, row_end: int, columns: list[str]) -> pd.DataFrame:
+    header = header_row = None
+    found: dict[int, list] = {}
+    past_end = False
+    last_row = 0
+    for block in blocks:
+        if header is not None:
+            block_last = _last_row_number(block, last_row)
+            if block_last < header_row + 1 + row_start:
+                last_row = block_last
+                continue
+        for row_number, values in _parse_shard(block):
+            row_number = row_number or last_row + 1
+            last_row = row_number
+            if header is None:
+                header, header_row = values, row_number
+                continue
+            index = row_number - header_row - 1
+            if index >= row_end:
+                past_end = True
+                break
+            if index >= row_start:
+                found[index] = values
+        if past_end:
+            break
+    if header is None:
+        return pd.DataFrame(columns=columns or [])
+    # blank rows inside the range count; trailing ones only when data follows the range
+    stop = row_end if past_end else (max(found) + 1 if found else row_start)
+    return _to_frame(header, [found.get(i, []) for i in range(row_start, stop)], columns)
+
+
+def _row_number_at(block: bytes, start: int) -> int | None:
+    match = _ROW_NUMBER.search(block, start, block.find(b'>', start))
+    return int(match.group(1)) if match else None
+
+
+def _last_row_number(block: bytes, previous: int) -> int:
+    starts = [m.start() for m in _ROW_START.finditer(block)]
+    if not starts:
+        return previous
+    return _row_number_at(block, starts[-1]) or previous + len(starts)
+
+
+def _raw_row_blocks(zf: zipfile.ZipFile, sheet_path: str, block_bytes: int) -> Iterator[bytes]:
+    """Yields the sheet's ``<row>`` elements in blocks of whole rows, decompressing as it goes."""
+    with zf.open(sheet_path) as f:
+        buf = b''
+        started = False
+        while True:
+            data = f.read(block_bytes)
+            buf += data
+            if not started:
+                open_at = buf.find(b'<sheetData')
+                open_end = buf.find(b'>', open_at) if open_at >= 0 else -1
+                if open_end < 0:
+                    if not data:
+                        raise ValueError(f"{sheet_path}: no <sheetData> found "
+                                         "(prefixed namespaces are not supported)")
+                    continue
+                if buf[open_end - 1:open_end] == b'/':
+                    return  # <sheetData/>: empty sheet
+                buf = buf[open_end + 1:]
+                started = True
+            close = buf.find(b'</sheetData>')
+            if close >= 0:
+                if buf[:close].strip():
+                    yield buf[:close]
+                return
+            if not data:
+                raise ValueError(f"{sheet_path}: truncated sheet, no </sheetData>")
+            # hold back the last, possibly incomplete, row
+            last = None
+            for last in _ROW_START.finditer(buf):
+                pass
+            if last is not None and last.start() > 0:
+                yield buf[:last.start()]
+                buf = buf[last.start():]
+
+
+def _iter_shard_rows(path: str, workers: int, shard_bytes: int) -> Iterator[tuple[list, list[list]]]:
+    """Yields ``(header, rows)`` per shard in sheet order, skipping shards without data rows."""
+    with zipfile.ZipFile(path) as zf:
+        strings = _read_shared_strings(zf)
+        date_styles = _read_date_styles(zf)
+        epoch = _read_epoch(zf)
+        sheet = zf.read(_first_sheet_path(zf))
+
+    body_start = sheet.find(b'<sheetData')
+    if body_start < 0:
+        raise ValueError(f"{path}: no <sheetData> found (prefixed namespaces are not supported)")
+    open_end = sheet.index(b'>', body_start)
+    if sheet[open_end - 1:open_end] == b'/':
+        return  # <sheetData/>: empty sheet
+    body_start = open_end + 1
+    body_end = sheet.index(b'</sheetData>', body_start)
+    shards = _split_rows(sheet, body_start, body_end, shard_bytes)
+    del sheet
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(strings, date_styles, epoch)) as pool:
+        # a bounded window keeps at most 2 x workers parsed shards waiting
+        pending = deque()
+        header = None
+        last_row = 0
+        shard_iter = iter(shards)
+        for shard in shard_iter:
+            pending.append(pool.submit(_parse_shard, shard))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            parsed = pending.popleft().result()
+            next_shard = next(shard_iter, None)
+            if next_shard is not None:
+                pending.append(pool.submit(_parse_shard, next_shard))
+
+            rows = []
+            for row_number, values in parsed:
+                row_number = row_number or last_row + 1
+                if header is None:
+                    header = values
+                else:
+                    # rows missing from the XML between data rows are blank rows
+                    rows.extend([] for _ in range(row_number - last_row - 1))
+                    rows.append(values)
+                last_row = row_number
+            if rows:
+                yield header, rows
+
+
+def _first_sheet_path(zf: zipfile.ZipFile) -> str:
+    workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+    sheet = workbook.find('m:sheets/m:sheet', _NS)
+    rel_id = sheet.get(f'{{{_REL_NS}}}id')
+    rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{{{_PKG_REL_NS}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    raise ValueError("workbook has no sheet relationship")
+
+
+def _read_shared_strings(zf: zipfile.ZipFile) -> list[str]:
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    strings = []
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, elem in ElementTree.iterparse(f):
+            if elem.tag == f'{{{_MAIN_NS}}}si':
+                # plain text is a direct <t>, rich text a run of <r><t>; phonetic <rPh> is skipped
+                texts = elem.findall('m:t', _NS) + elem.findall('m:r/m:t', _NS)
+                strings.append(''.join(t.text or '' for t in texts))
+                elem.clear()
+    return strings
+
+
+def _split_rows(sheet: bytes, start: int, end: int, shard_bytes: int) -> list[bytes]:
+    shards = []
+    while start < end:
+        cut = end
+        if end - start > shard_bytes:
+            match = _ROW_START.search(sheet, start + shard_bytes, end)
+            if match:
+                cut = match.start()
+        shards.append(sheet[start:cut])
+        start = cut
+    return shards
+
+
+def _read_date_styles(zf: zipfile.ZipFile) -> dict[int, bool]:
+    """Maps each date-formatted cell style index to whether it is a duration format."""
+    if 'xl/styles.xml' not in zf.namelist():
+        return {}
+    styles = ElementTree.fromstring(zf.read('xl/styles.xml'))
+    custom = {
+        int(fmt.get('numFmtId')): fmt.get('formatCode')
+        for fmt in styles.findall('m:numFmts/m:numFmt', _NS)
+    }
+    date_styles = {}
+    for index, xf in enumerate(styles.findall('m:cellXfs/m:xf', _NS)):
+        fmt_id = int(xf.get('numFmtId', 0))
+        code = custom.get(fmt_id, BUILTIN_FORMATS.get(fmt_id))
+        if code and is_date_format(code):
+            date_styles[index] = is_timedelta_format(code)
+    return date_styles
+
+
+def _read_epoch(zf: zipfile.ZipFile):
+    workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+    pr = workbook.find('m:workbookPr', _NS)
+    if pr is not None and pr.get('date1904') in ('1', 'true'):
+        return CALENDAR_MAC_1904
+    return CALENDAR_WINDOWS_1900
+
+
+def _init_worker(strings: list[str], date_styles: dict[int, bool], epoch):
+    global _shared_strings, _date_styles, _epoch
+    _shared_strings = strings
+    _date_styles = date_styles
+    _epoch = epoch
+
+
+def _parse_shard(shard: bytes) -> list[tuple]:
+    """
+    Parses a run of <row> elements into ``(row number, values)`` pairs, values
+    indexed by column. Blank rows are left out; the caller restores the gaps.
+    """
+    root = ElementTree.fromstring(b'<sheetData xmlns="' + _MAIN_NS.encode() + b'">' + shard + b'</sheetData>')
+    rows = []
+    for row in root:
+        values = []
+        for position, cell in enumerate(row):
+            ref = cell.get('r')
+            col = _column_index(ref) if ref else position
+            if col >= len(values):
+                values.extend([None] * (col + 1 - len(values)))
+            values[col] = _cell_value(cell)
+        if any(v is not None for v in values):
+            r = row.get('r')
+            rows.append((int(r) if r else None, values))
+    return rows
+
+
+def _column_index(ref: str) -> int:
+    letters = _CELL_REF.match(ref).group(1)
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+def _cell_value(cell):
+    # empty strings come back as None, as pandas.read_excel treats them
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        texts = cell.findall('m:is/m:t', _NS) + cell.findall('m:is/m:r/m:t', _NS)
+        return ''.join(t.text or '' for t in texts) or None
+    v = cell.find('m:v', _NS)
+    if v is None or v.text is None:
+        return None
+    if kind == 's':
+        return _shared_strings[int(v.text)] or None
+    if kind == 'b':
+        return v.text == '1'
+    if kind == 'e':
+        return None
+    if kind == 'str':
+        return v.text or None
+    if kind == 'd':
+        return from_ISO8601(v.text)
+    try:
+        value = int(v.text)
+    except ValueError:
+        value = float(v.text)
+    style = int(cell.get('s', 0))
+    if style in _date_styles:
+        try:
+            return from_excel(value, _epoch, timedelta=_date_styles[style])
+        except (OverflowError, ValueError):
+            return None
+    return value
+
+
+def _to_frame(header: list, rows: list[list], columns: list[str] = None) -> pd.DataFrame:
+    names = [str(h) if h is not None else f'Unnamed: {i}' for i, h in enumerate(header)]
+    wanted = columns or names
+    missing = [c for c in wanted if c not in names]
+    if missing:
+        raise KeyError(f"columns not found in sheet: {missing}")
+    data = {}
+    for name in wanted:
+        i = names.index(name)
+        data[name] = [r[i] if i < len(r) and r[i] is not None else np.nan for r in rows]
+    return pd.DataFrame(data)
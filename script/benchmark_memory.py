@@ -0,0 +1,189 @@
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# allow ``python script/benchmark_memory.py`` from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_CITIES = ["Springfield", "Austin", "Toronto", "Manchester", "Berlin", "Paris"]
+_STATES = ["TX", "CA", "ON", "QC", "", ""]
+
+
+class _FakeParsed:
+    """Stands in for a Deepparse FormattedParsedAddress so only result assembly is measured."""
+
+    def __init__(self, address: str):
+        number, _, rest = address.partition(' ')
+        city = _CITIES[len(address) % len(_CITIES)]
+        self._d = {
+            'StreetNumber': number, 'Unit': None, 'StreetName': rest.split(',')[0],
+            'Orientation': None, 'Municipality': city,
+            'Province': _STATES[len(address) % len(_STATES)],
+            'PostalCode': f"{len(address):05d}", 'GeneralDelivery': None,
+        }
+
+    def to_dict(self):
+        return self._d
+
+
+def _fake_model(addresses, **kwargs):
+    return [_FakeParsed(a) for a in addresses]
+
+
+def _input_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    nums = rng.integers(1, 2000, size=n)
+    return pd.DataFrame({
+        'ID': [f"{i:012d}" for i in range(n)],
+        'ADDRESSLINE1': [f"{h} Maple Street" for h in nums],
+        'ADDRESSLINE2': [_CITIES[h % len(_CITIES)] for h in nums],
+        'ADDRESSLINE3': rng.choice(['US', 'CA', 'UK', 'DE', 'FR'], size=n),
+    })
+
+
+def _legacy_parse(svc, df: pd.DataFrame) -> pd.DataFrame:
+    """The original parse_file assembly: parsed_map dicts -> record dicts -> DataFrame."""
+    from pipeline.parser import _COUNTRY_MAP, _US_STATES, _CA_PROVINCES, _UK_PC
+
+    def join_lines(r):
+        parts = [str(r.get(c, '')).strip() for c in ('ADDRESSLINE1', 'ADDRESSLINE2', 'ADDRESSLINE3')]
+        return ', '.join(p for p in parts if p)
+
+    df['full_address'] = df.apply(join_lines, axis=1)
+    parsed_map = {i: obj.to_dict() for i, obj in enumerate(svc._parser(list(df['full_address'])))}
+    ts = 'ts'
+    records = []
+    for i, row in df.iterrows():
+        d = parsed_map.get(i, {})
+        lines = [row.get(c, '') for c in ('ADDRESSLINE1', 'ADDRESSLINE2', 'ADDRESSLINE3')]
+        if all(str(x).strip() for x in lines):
+            status = 'PERFECT'
+        elif any(str(x).strip() for x in lines):
+            status = 'PARTIAL'
+        else:
+            status = 'INVALID'
+        state_raw = (d.get('state') or d.get('Province') or '').strip()
+        country = _COUNTRY_MAP.get(str(row['ADDRESSLINE3']).strip().lower(), '')
+        if not country:
+            if state_raw.lower() in _US_STATES:
+                country = 'US'
+            elif state_raw.lower() in _CA_PROVINCES:
+                country = 'CA'
+        if not country and _UK_PC.search(row['full_address']):
+            country = 'GB'
+        records.append({
+            'ID': str(row.get('ID')), 'full_address': row['full_address'],
+            'house_number': d.get('StreetNumber'), 'road': d.get('StreetName'),
+            'city': d.get('Municipality'), 'state': state_raw, 'postcode': d.get('PostalCode'),
+            'country': country, 'filename': f"bench.xlsx_{ts}", 'processed_timestamp': ts,
+            'extracted_by': svc.extracted_by, 'status': status,
+        })
+    return pd.DataFrame(records)
+
+
+def _legacy_parse_file(svc, path: str, out_dir: str) -> pd.DataFrame:
+    """The original parse_file: read, legacy assembly, then one to_excel of the whole result."""
+    result = _legacy_parse(svc, pd.read_excel(path, engine='openpyxl'))
+    result.to_excel(str(Path(out_dir) / 'legacy.xlsx'), index=False)
+    return result
+
+
+MODES = {
+    # in memory: the original assembly vs AddressParserService.parse (chunked, joined column by column)
+    'legacy_parse': lambda svc, df, path, out: _legacy_parse(svc, df),
+    'parse': lambda svc, df, path, out: svc.parse(df, source='bench.xlsx', ts='ts'),
+    # end to end from an .xlsx on disk, including the processed output
+    'legacy_parse_file': lambda svc, df, path, out: _legacy_parse_file(svc, path, out),
+    'parse_file': lambda svc, df, path, out: svc.parse_file(path, out)[0],
+}
+
+
+def _measure(mode: str, rows: int, input_path: str, trace: bool) -> dict:
+    """
+    Runs one mode in this process. With ``trace`` it reports the peak bytes
+    allocated during the run: tracemalloc's peak (Python objects and numpy
+    buffers) plus the growth of the Arrow memory pool's peak (Arrow-backed
+    strings). Otherwise it reports the wall time; tracing slows the run.
+    Unlike peak RSS, neither is masked by memory the input preparation
+    already touched.
+    """
+    import pyarrow as pa
+
+    with patch("pipeline.parser.AddressParser", return_value=_fake_model):
+        from pipeline.parser import AddressParserService
+        svc = AddressParserService(extracted_by='bench')
+
+    # file modes read the input themselves; in-memory modes get it prepared
+    df = None if mode.endswith('parse_file') else pd.read_excel(input_path, engine='openpyxl')
+    out_dir = tempfile.mkdtemp()
+    pool = pa.default_memory_pool()
+    arrow_before = pool.max_memory()
+    try:
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        result = MODES[mode](svc, df, input_path, out_dir)
+        elapsed = time.perf_counter() - started
+        py_peak = tracemalloc.get_traced_memory()[1] if trace else 0
+        tracemalloc.stop()
+    finally:
+        shutil.rmtree(out_dir)
+
+    if not trace:
+        return {'seconds': round(elapsed, 3)}
+    return {
+        'peak_alloc_mb': round((py_peak + max(pool.max_memory() - arrow_before, 0)) / 2 ** 20, 1),
+        'result_mb': round(result.memory_usage(deep=True).sum() / 2 ** 20, 1),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compare peak memory of the legacy and current parse paths.")
+    p.add_argument("--rows", "-n", type=int, default=100_000, help="Rows per run")
+    p.add_argument("--mode", choices=list(MODES), help=argparse.SUPPRESS)
+    p.add_argument("--input", help=argparse.SUPPRESS)
+    p.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.mode:
+        print(json.dumps(_measure(args.mode, args.rows, args.input, args.trace)))
+        return
+
+    work_dir = tempfile.mkdtemp()
+    try:
+        input_path = str(Path(work_dir) / 'bench.xlsx')
+        _input_frame(args.rows).to_excel(input_path, index=False)
+
+        # every run gets a fresh interpreter, so no mode inherits another's allocations
+        results = {}
+        for mode in MODES:
+            results[mode] = {}
+            for trace in (False, True):
+                cmd = [sys.executable, __file__, '--rows', str(args.rows), '--mode', mode, '--input', input_path]
+                out = subprocess.run(cmd + (['--trace'] if trace else []), check=True, capture_output=True,
+                                     text=True)
+                results[mode].update(json.loads(out.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(work_dir)
+
+    for mode, r in results.items():
+        print(f"{mode:>17}: {args.rows:,} rows  {r['seconds']:>7}s  "
+              f"peak alloc {r['peak_alloc_mb']} MB  result {r['result_mb']} MB")
+    for legacy, current in (('legacy_parse', 'parse'), ('legacy_parse_file', 'parse_file')):
+        if results[legacy]['peak_alloc_mb']:
+            saved = 1 - results[current]['peak_alloc_mb'] / results[legacy]['peak_alloc_mb']
+            print(f"{current} peak memory reduction: {saved:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# allow ``python script/benchmark_repository.py`` from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.jdbc_repository import JdbcRepository  # noqa: E402
+from pipeline.repository import DatabaseRepository  # noqa: E402
+
+_H2_JAR = Path(__file__).resolve().parents[1] / 'resources' / 'data' / 'h2-2.3.232.jar'
+
+
+class _BenchConfig:
+    table_name = 'iso_address'
+    database_url = ''
+    datasource_driver = 'org.h2.Driver'
+    datasource_url = ''
+    datasource_username = 'sa'
+    datasource_password = ''
+    datasource_jar = str(_H2_JAR)
+
+
+def _parsed_frame(n: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    nums = rng.integers(1, 2000, size=n)
+    return pd.DataFrame({
+        'ID': [f"{i:012d}" for i in range(n)],
+        'full_address': [f"{h} Maple Street, Springfield, US" for h in nums],
+        'house_number': nums.astype(str),
+        'road': 'Maple Street',
+        'city': 'Springfield',
+        'state': rng.choice(['TX', 'CA', 'ON', ''], size=n),
+        'postcode': [f"{h:05d}" for h in nums],
+        'country': pd.Categorical(rng.choice(['US', 'CA'], size=n)),
+        'filename': pd.Categorical(['bench.xlsx_ts'] * n),
+        'processed_timestamp': pd.Categorical(['ts'] * n),
+        'extracted_by': pd.Categorical(['bench'] * n),
+        'status': pd.Categorical(['PERFECT'] * n),
+    })
+
+
+def _time_saves(repo, df: pd.DataFrame, batch_size: int) -> tuple[float, float]:
+    """Times a cold insert and then an upsert of the same ids."""
+    started = time.perf_counter()
+    repo.save(df, batch_size=batch_size)
+    insert = time.perf_counter() - started
+    started = time.perf_counter()
+    repo.save(df, batch_size=batch_size)
+    return insert, time.perf_counter() - started
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compare SQLAlchemy and JDBC (H2 MERGE) write throughput.")
+    p.add_argument("--rows", "-n", type=int, default=100_000, help="Rows per save")
+    p.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT / executemany batch")
+    p.add_argument("--url", help="SQLAlchemy URL to benchmark (default: a temporary SQLite file)")
+    args = p.parse_args()
+
+    df = _parsed_frame(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        cfg = _BenchConfig()
+        cfg.database_url = args.url or f"sqlite:///{Path(tmp) / 'bench.db'}"
+        cfg.datasource_url = f"jdbc:h2:file:{Path(tmp) / 'bench'};MODE=PostgreSQL"
+
+        dialect = cfg.database_url.split(':')[0]
+        results = [(f'sqlalchemy/{dialect}', _time_saves(DatabaseRepository(cfg), df, args.batch_size))]
+        try:
+            results.append(('jdbc/h2', _time_saves(JdbcRepository(cfg), df, args.batch_size)))
+        except Exception as e:  # no JVM or jaydebeapi on this machine
+            print(f"jdbc: skipped ({e})")
+
+    for backend, (insert, upsert) in results:
+        print(f"{backend:>18}: insert {args.rows / insert:>10,.0f} rows/s   "
+              f"upsert {args.rows / upsert:>10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
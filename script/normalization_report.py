@@ -0,0 +1,51 @@
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# allow ``python script/normalization_report.py`` from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pipeline.normalize import TextNormalizer, collision_report  # noqa: E402
+
+_LINES = ['ADDRESSLINE1', 'ADDRESSLINE2', 'ADDRESSLINE3']
+
+
+def _full_addresses(path: Path) -> pd.Series:
+    """Joins the address lines the way the parser builds ``full_address``."""
+    if path.suffix.lower() == '.csv':
+        df = pd.read_csv(path, usecols=lambda c: c in _LINES, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_excel(path, engine='openpyxl', usecols=lambda c: c in _LINES, dtype=str)
+    parts = [df[c].fillna('').astype(str).str.strip() if c in df.columns else pd.Series('', index=df.index)
+             for c in _LINES]
+    joined = parts[0].str.cat(parts[1:], sep=', ')
+    # drop the separators left by empty lines
+    return joined.str.replace(r'(, )+', ', ', regex=True).str.strip(', ')
+
+
+def main():
+    p = argparse.ArgumentParser(description="Measure how much canonical keys increase address dedup.")
+    p.add_argument("files", nargs='+', help="Input .xlsx or .csv files with ADDRESSLINE1..3")
+    p.add_argument("--no-abbreviations", action="store_true", help="Skip abbreviation expansion")
+    p.add_argument("--examples", type=int, default=5, help="Merged keys to show")
+    args = p.parse_args()
+
+    addresses = pd.concat([_full_addresses(Path(f)) for f in args.files], ignore_index=True)
+    normalizer = TextNormalizer(expand_abbreviations=not args.no_abbreviations)
+    r = collision_report(addresses, normalizer, examples=args.examples)
+
+    print(f"rows:               {r['rows']:,}")
+    print(f"distinct raw:       {r['distinct_raw']:,}  ({r['raw_duplicate_rate']:.1%} duplicates)")
+    print(f"distinct keys:      {r['distinct_keys']:,}  ({r['key_duplicate_rate']:.1%} duplicates)")
+    saved = r['distinct_raw'] - r['distinct_keys']
+    print(f"model calls saved:  {saved:,} ({saved / r['distinct_raw']:.1%} of raw-distinct)" if r['distinct_raw']
+          else "model calls saved:  0")
+    print(f"keys merging >1 raw spelling: {r['keys_with_merged_variants']:,}")
+    for ex in r['top_merged']:
+        print(f"  {ex['variants']:>4} x {ex['key']!r}: {ex['sample']}")
+
+
+if __name__ == "__main__":
+    main()
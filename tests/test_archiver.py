@@ -1,8 +1,11 @@
+import errno
+import gzip
 import os
 import shutil
 import tempfile
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 from pipeline.archiver import Archiver
 
@@ -57,5 +60,68 @@ class TestArchiver(unittest.TestCase):
             self.archiver.archive(self.original_name, self.processed_path)
 
 
+
+class TestSafeArchiver(TestArchiver):
+    """Runs the same scenarios through mode='safe', plus its own guarantees."""
+
+    def setUp(self):
+        super().setUp()
+        self.archiver = Archiver(
+            input_dir=self.input_dir,
+            archive_input_dir=self.archive_input_dir,
+            archive_processed_dir=self.archive_processed_dir,
+            mode='safe',
+            workers=2
+        )
+
+    def test_missing_processed_leaves_raw_in_place(self):
+        os.remove(self.processed_path)
+        with self.assertRaises(FileNotFoundError):
+            self.archiver.archive(self.original_name, self.processed_path)
+        self.assertTrue(Path(self.original_path).exists())
+
+    def test_cross_device_falls_back_to_copy(self):
+        real_rename = os.rename
+
+        def no_cross_device(src, dst):
+            if str(src).startswith(self.input_dir):
+                raise OSError(errno.EXDEV, "Invalid cross-device link")
+            return real_rename(src, dst)
+
+        with patch("pipeline.archiver.os.rename", side_effect=no_cross_device):
+            self.archiver.archive(self.original_name, self.processed_path)
+
+        archived = Path(self.archive_input_dir) / f"mydata_{self.timestamp}.xlsx"
+        self.assertEqual(archived.read_text(), "raw")
+        self.assertFalse(Path(self.original_path).exists())
+        self.assertEqual(
+            [p.name for p in Path(self.archive_input_dir).iterdir()], [archived.name],
+            "temp file left behind"
+        )
+
+    def test_gzip_compression(self):
+        archiver = Archiver(
+            input_dir=self.input_dir,
+            archive_input_dir=self.archive_input_dir,
+            archive_processed_dir=self.archive_processed_dir,
+            mode='safe',
+            compression='gzip'
+        )
+        archived = archiver.archive_many([(self.original_name, self.processed_path)])
+
+        raw_gz = Path(self.archive_input_dir) / f"mydata_{self.timestamp}.xlsx.gz"
+        self.assertIn(str(raw_gz), archived)
+        self.assertEqual(gzip.decompress(raw_gz.read_bytes()), b"raw")
+        processed_gz = Path(self.archive_processed_dir) / f"{self.processed_filename}.gz"
+        self.assertEqual(gzip.decompress(processed_gz.read_bytes()), b"processed")
+        self.assertFalse(Path(self.processed_path).exists())
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            Archiver(self.input_dir, self.archive_input_dir, self.archive_processed_dir, mode='copy')
+        with self.assertRaises(ValueError):
+            Archiver(self.input_dir, self.archive_input_dir, self.archive_processed_dir, compression='gzip')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pandas as pd
+from sqlalchemy import text
+
+from pipeline.checkpoint import CheckpointStore
+from pipeline.extractor import ExcelExtractor
+from pipeline.flow import _process_file
+from pipeline.repository import DatabaseRepository
+
+
+class DummyConfig:
+    def __init__(self, base_dir):
+        self.input_dir = str(Path(base_dir) / "in")
+        self.extracted_dir = str(Path(base_dir) / "extracted")
+        self.processed_dir = str(Path(base_dir) / "processed")
+        self.database_url = f"sqlite:///{Path(base_dir) / 'test.db'}"
+        self.table_name = "iso_address"
+        self.checkpoint_chunk_rows = 2
+        self.output_format = None
+
+
+def fake_parse(df, source, ts):
+    return pd.DataFrame({
+        "ID": df["ID"].astype(str).tolist(),
+        "full_address": df["ADDRESSLINE1"].tolist(),
+        "filename": f"{source}_{ts}",
+        "processed_timestamp": ts,
+        "status": "PERFECT",
+    })
+
+
+class TestCheckpointedProcessing(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cfg = DummyConfig(self.tmp_dir)
+        for d in (self.cfg.input_dir, self.cfg.processed_dir):
+            os.makedirs(d)
+        pd.DataFrame({
+            "ID": [1, 2, 3, 4, 5], "ADDRESSLINE1": [f"{i} Main St" for i in range(1, 6)],
+            "ADDRESSLINE2": ["x"] * 5, "ADDRESSLINE3": ["US"] * 5,
+        }).to_excel(Path(self.cfg.input_dir) / "big.xlsx", index=False)
+
+        self.extractor = ExcelExtractor(self.cfg.input_dir, self.cfg.extracted_dir)
+        self.repo = DatabaseRepository(self.cfg)
+        self.store = CheckpointStore(self.repo.engine)
+        self.parser_svc = MagicMock()
+        self.archiver = MagicMock()
+
+    def tearDown(self):
+        self.repo.engine.dispose()
+        shutil.rmtree(self.tmp_dir)
+
+    def _run(self):
+        _process_file("big.xlsx", self.cfg, self.extractor, self.parser_svc, self.repo, self.archiver,
+                      MagicMock(), self.store)
+
+    def _scalar(self, sql):
+        with self.repo.engine.begin() as conn:
+            return conn.execute(text(sql)).scalar()
+
+    def test_rerun_resumes_after_last_committed_chunk(self):
+        calls = []
+
+        def crash_on_second(df, source, ts):
+            calls.append(df["ID"].tolist())
+            if len(calls) == 2:
+                raise RuntimeError("worker died")
+            return fake_parse(df, source, ts)
+
+        self.parser_svc.parse.side_effect = crash_on_second
+        with self.assertRaises(RuntimeError):
+            self._run()
+        self.assertEqual(self._scalar("SELECT COUNT(*) FROM iso_address"), 2)
+        self.assertEqual(self._scalar("SELECT COUNT(*) FROM iso_checkpoint"), 1)
+        first_ts = self._scalar("SELECT processed_timestamp FROM iso_address LIMIT 1")
+
+        calls.clear()
+
+        def record_calls(df, source, ts):
+            calls.append(df["ID"].tolist())
+            return fake_parse(df, source, ts)
+
+        self.parser_svc.parse.side_effect = record_calls
+        self._run()
+
+        # inference only ran for the chunks that had not been committed
+        self.assertEqual(calls, [[3, 4], [5]])
+        self.assertEqual(self._scalar("SELECT COUNT(*) FROM iso_address"), 5)
+        self.assertEqual(self._scalar("SELECT COUNT(DISTINCT processed_timestamp) FROM iso_address"), 1)
+        self.assertEqual(self._scalar("SELECT processed_timestamp FROM iso_address LIMIT 1"), first_ts)
+        self.assertEqual(self._scalar("SELECT COUNT(*) FROM iso_checkpoint"), 0)
+
+        processed_path = self.archiver.archive.call_args.args[1]
+        self.assertEqual(pd.read_excel(processed_path)["ID"].tolist(), [1, 2, 3, 4, 5])
+        self.assertFalse(any((Path(self.cfg.processed_dir) / ".parts").glob("*/*.parquet")))
+
+    def test_changed_file_starts_over(self):
+        in_path = str(Path(self.cfg.input_dir) / "big.xlsx")
+        run = self.store.begin(in_path, source="big.xlsx", ts="t1")
+        with self.repo.engine.begin() as conn:
+            self.store.record(conn, run, 0, 2)
+
+        self.assertEqual(self.store.begin(in_path, source="other", ts="t2").committed, {0: 2})
+        os.utime(in_path, ns=(1, 1))
+        self.assertEqual(self.store.begin(in_path, source="other", ts="t2").committed, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
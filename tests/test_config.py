@@ -46,16 +46,21 @@ class TestConfig(unittest.TestCase):
         self.assertTrue(cfg.processed_dir.endswith(os.path.join("proc")))
         self.assertTrue(cfg.archive_input_dir.endswith(os.path.join("arc_in")))
         self.assertTrue(cfg.archive_processed_dir.endswith(os.path.join("arc_proc")))
+        self.assertEqual(cfg.archive_mode, "move")
+        self.assertIsNone(cfg.archive_compression)
+        self.assertIsNone(cfg.output_format)
 
         # datasource
         self.assertEqual(cfg.datasource_url, "jdbc:postgresql://localhost:5432/db")
         self.assertEqual(cfg.datasource_driver, "org.postgresql.Driver")
         self.assertEqual(cfg.datasource_username, "user")
         self.assertEqual(cfg.datasource_password, "pw")
+        self.assertTrue(cfg.datasource_jar.endswith(os.path.join("resources", "data", "h2-2.3.232.jar")))
 
         # database
         self.assertEqual(cfg.database_url, "postgresql://user@localhost:5432/db")
         self.assertEqual(cfg.table_name, "my_table")
+        self.assertEqual(cfg.database_backend, "sqlalchemy")
 
         rep = repr(cfg)
         self.assertIn("input_dir=", rep)
@@ -4,7 +4,10 @@ import unittest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
-from pipeline.flow import deepparse_flow
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from pipeline.flow import deepparse_flow, deepparse_watch_flow, deepparse_worker_flow
 
 
 class FakeConfig:
@@ -14,8 +17,37 @@ class FakeConfig:
         self.processed_dir = str(Path(base_dir) / "processed")
         self.archive_input_dir = str(Path(base_dir) / "archive" / "in")
         self.archive_processed_dir = str(Path(base_dir) / "archive" / "processed")
+        self.extract_workers = 1
+        self.output_format = None
+        self.archive_mode = "move"
+        self.archive_compression = None
+        self.archive_workers = 1
+        self.watch_poll_interval = 0.1
+        self.watch_settle_seconds = 0.1
+        self.watch_use_inotify = False
+        self.watch_retry_backoff = 0.1
+        self.watch_max_retry_backoff = 1
+        self.parser_with_prob = False
+        self.parser_confidence_threshold = None
+        self.parser_fallback_model = None
+        self.reference_postcode_path = None
+        self.reference_city_path = None
+        self.queue_shard_rows = 2
+        self.queue_lease_seconds = 60
+        self.queue_max_attempts = 3
+        self.tuning_enabled = False
+        self.normalize_enabled = False
+        self.checkpoint_enabled = False
+        self.profiling_enabled = False
+        self.profiling_sample_rate = 1.0
+        self.profiling_torch = False
+        self.profiling_interval_ms = 10
+        self.checkpoint_chunk_rows = 2
+        self.normalize_cache_size = 0
+        self.tuning_memory_limit_mb = None
 
         self.database_url = ""
+        self.database_backend = "sqlalchemy"
         self.table_name = ""
 
 
@@ -56,7 +88,7 @@ class TestDeepParseFlow(unittest.TestCase):
         deepparse_flow(config_path="ignored")
 
         mock_extractor.return_value.extract.assert_not_called()
-        mock_parser.return_value.parse_file.assert_not_called()
+        mock_parser.from_config.return_value.parse_file.assert_not_called()
         mock_repo.return_value.save.assert_not_called()
         mock_archiver.return_value.archive.assert_not_called()
 
@@ -86,12 +118,12 @@ class TestDeepParseFlow(unittest.TestCase):
 
         dummy_df = MagicMock(name="DataFrame")
         processed_path = str(Path(self.fake_cfg.processed_dir) / "pr_foo.xlsx")
-        mock_parser.return_value.parse_file.return_value = (dummy_df, processed_path)
+        mock_parser.from_config.return_value.parse_file.return_value = (dummy_df, processed_path)
 
         deepparse_flow(config_path="ignored")
 
         mock_extractor.return_value.extract.assert_called_once_with(dummy_file)
-        mock_parser.return_value.parse_file.assert_called_once_with(
+        mock_parser.from_config.return_value.parse_file.assert_called_once_with(
             extracted_path, self.fake_cfg.processed_dir
         )
 
@@ -100,6 +132,78 @@ class TestDeepParseFlow(unittest.TestCase):
             dummy_file, processed_path
         )
 
+    @patch("pipeline.flow.Config")
+    @patch("pipeline.flow.ExcelExtractor")
+    @patch("pipeline.flow.AddressParserService")
+    @patch("pipeline.flow.DatabaseRepository")
+    @patch("pipeline.flow.Archiver")
+    @patch("pipeline.flow.DirectoryWatcher")
+    def test_watch_reuses_pipeline_and_survives_failures(
+            self,
+            mock_watcher,
+            mock_archiver,
+            mock_repo,
+            mock_parser,
+            mock_extractor,
+            mock_config_cls
+    ):
+        mock_config_cls.return_value = self.fake_cfg
+        mock_watcher.return_value.__iter__.return_value = iter(["bad.xlsx", "good.xlsx"])
+
+        mock_extractor.return_value.extract.side_effect = [RuntimeError("corrupt"), "ex_good.xlsx"]
+        dummy_df = MagicMock(name="DataFrame")
+        mock_parser.from_config.return_value.parse_file.return_value = (dummy_df, "pr_good.xlsx")
+
+        deepparse_watch_flow(config_path="ignored", max_files=2)
+
+        mock_parser.from_config.assert_called_once_with(self.fake_cfg, batch_sizer=None)
+        mock_parser.from_config.return_value.parse_file.assert_called_once_with(
+            "ex_good.xlsx", self.fake_cfg.processed_dir
+        )
+        mock_repo.return_value.save.assert_called_once_with(dummy_df)
+        mock_archiver.return_value.archive.assert_called_once_with("good.xlsx", "pr_good.xlsx")
+        mock_watcher.return_value.retry.assert_called_once_with("bad.xlsx")
+        mock_watcher.return_value.stop.assert_called_once_with()
+
+    @patch("pipeline.flow.Config")
+    @patch("pipeline.flow.AddressParserService")
+    def test_workers_split_file_into_shards(self, mock_parser, mock_config_cls):
+        self.fake_cfg.database_url = f"sqlite:///{Path(self.tmp_root) / 'db.sqlite'}"
+        self.fake_cfg.table_name = "iso_address"
+        mock_config_cls.return_value = self.fake_cfg
+
+        pd.DataFrame({
+            "ID": ["a", "b", "c", "d", "e"],
+            "ADDRESSLINE1": ["1 A St", "2 B St", "3 C St", "4 D St", "5 E St"],
+            "ADDRESSLINE2": ["Town"] * 5,
+            "ADDRESSLINE3": ["US"] * 5,
+        }).to_excel(Path(self.fake_cfg.input_dir) / "big.xlsx", index=False)
+
+        def fake_parse(df, source, ts):
+            return pd.DataFrame({
+                "ID": df["ID"].astype(str), "full_address": df["ADDRESSLINE1"],
+                "filename": f"{source}_{ts}", "status": "PERFECT",
+            })
+
+        mock_parser.from_config.return_value.parse.side_effect = fake_parse
+
+        deepparse_worker_flow(config_path="ignored", worker_id="w1", max_shards=2)
+        self.assertTrue((Path(self.fake_cfg.input_dir) / "big.xlsx").exists())
+
+        deepparse_worker_flow(config_path="ignored", worker_id="w2")
+
+        engine = create_engine(self.fake_cfg.database_url)
+        with engine.begin() as conn:
+            ids = sorted(r[0] for r in conn.execute(text("SELECT id FROM iso_address")))
+            owners = sorted(r[0] for r in conn.execute(text("SELECT owner FROM iso_work_queue")))
+        engine.dispose()
+
+        self.assertEqual(ids, ["a", "b", "c", "d", "e"])
+        self.assertEqual(owners, ["w1", "w1", "w2"])
+        self.assertFalse((Path(self.fake_cfg.input_dir) / "big.xlsx").exists())
+        self.assertEqual(len(list(Path(self.fake_cfg.archive_input_dir).iterdir())), 1)
+        self.assertEqual(len(list(Path(self.fake_cfg.archive_processed_dir).iterdir())), 3)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,85 @@
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+import pandas as pd
+
+from pipeline import jdbc_repository
+from pipeline.jdbc_repository import JdbcRepository
+
+
+class DummyConfig:
+    datasource_driver = "org.h2.Driver"
+    datasource_url = "jdbc:h2:mem:test"
+    datasource_username = "sa"
+    datasource_password = ""
+    datasource_jar = "/tmp/h2.jar"
+    table_name = "iso_address"
+
+
+class TestJdbcRepository(unittest.TestCase):
+    def setUp(self):
+        self.fake_jdbc = MagicMock()
+        self.conn = self.fake_jdbc.connect.return_value
+        self.cursor = self.conn.cursor.return_value
+        patcher = patch.dict(sys.modules, {"jaydebeapi": self.fake_jdbc})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(jdbc_repository.close_connections)
+
+    def test_connects_once_per_process_and_creates_table(self):
+        JdbcRepository(DummyConfig())
+        JdbcRepository(DummyConfig())
+
+        self.fake_jdbc.connect.assert_called_once_with(
+            "org.h2.Driver", "jdbc:h2:mem:test", ["sa", ""], "/tmp/h2.jar"
+        )
+        self.conn.jconn.setAutoCommit.assert_called_once_with(False)
+        ddl = self.cursor.execute.call_args_list[0].args[0]
+        self.assertIn("CREATE TABLE IF NOT EXISTS iso_address", ddl)
+
+    def test_save_merges_in_batches_and_commits_once(self):
+        repo = JdbcRepository(DummyConfig())
+        self.conn.commit.reset_mock()
+        df = pd.DataFrame({
+            "ID": ["a", "b", "c", "a", None],
+            "full_address": ["1 A St", None, "3 C St", "1 A St (new)", "x"],
+            "country": pd.Categorical(["US", "CA", "US", "US", "US"]),
+            "status": ["PERFECT"] * 5,
+            "confidence": [0.5, np.nan, 0.9, 0.7, 0.1],
+        })
+
+        repo.save(df, batch_size=2)
+
+        calls = self.cursor.executemany.call_args_list
+        self.assertEqual(len(calls), 2)
+        sql = calls[0].args[0]
+        self.assertTrue(sql.startswith("MERGE INTO iso_address (id, full_address"))
+        self.assertIn("KEY(id)", sql)
+        rows = calls[0].args[1] + calls[1].args[1]
+        # one row per id, the last occurrence winning; NaN and None bind as NULL
+        self.assertEqual([r[0] for r in rows], ["b", "c", "a"])
+        self.assertEqual(rows[0][1], None)
+        self.assertEqual(rows[0][12], None)
+        self.assertEqual(rows[2][1], "1 A St (new)")
+        self.assertEqual(rows[2][7], "US")
+        self.assertEqual(rows[2][12], 0.7)
+        self.conn.commit.assert_called_once()
+
+    def test_failed_batch_rolls_back(self):
+        repo = JdbcRepository(DummyConfig())
+        self.cursor.executemany.side_effect = RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            repo.save(pd.DataFrame({"ID": ["a"], "status": ["PERFECT"]}))
+        self.conn.rollback.assert_called_once()
+
+    def test_missing_driver_package_is_reported(self):
+        with patch.dict(sys.modules, {"jaydebeapi": None}):
+            with self.assertRaises(ImportError):
+                JdbcRepository(DummyConfig())
+
+
+if __name__ == "__main__":
+    unittest.main()
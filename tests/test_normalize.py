@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from pipeline.normalize import TextNormalizer, collision_report
+from tests.test_parser import DummyProbParsed, fake_model
+
+
+class TestTextNormalizer(unittest.TestCase):
+    def test_trivial_variants_share_a_key(self):
+        keys = TextNormalizer().normalize([
+            "123 Main St.", "123  MAIN ST", "１２３ Main Street", "123 Main Street, Apt 4", None
+        ])
+        self.assertEqual(keys.tolist()[:3], ["123 main street"] * 3)
+        self.assertEqual(keys[3], "123 main street apartment 4")
+        self.assertEqual(keys[4], "")
+
+    def test_steps_are_configurable(self):
+        normalizer = TextNormalizer(expand_abbreviations=False, collapse_punctuation=False)
+        self.assertEqual(normalizer.normalize(["  12 Elm  St. "]).tolist(), ["12 elm st."])
+
+        custom = TextNormalizer(abbreviations={"Hts": "heights"})
+        self.assertEqual(custom.normalize(["1 Park Hts"]).tolist(), ["1 park heights"])
+
+    def test_collision_report(self):
+        report = collision_report(
+            ["1 Main St", "1 main st.", "1 Main Street", "2 Oak Rd", "2 Oak Rd", ""], TextNormalizer()
+        )
+        self.assertEqual(report["rows"], 5)
+        self.assertEqual(report["distinct_raw"], 4)
+        self.assertEqual(report["distinct_keys"], 2)
+        self.assertEqual(report["keys_with_merged_variants"], 1)
+        self.assertEqual(report["top_merged"][0]["key"], "1 main street")
+        self.assertEqual(report["top_merged"][0]["variants"], 3)
+
+    @patch("pipeline.parser.AddressParser")
+    def test_parser_sends_each_key_once_with_original_text(self, mock_parser_class):
+        from pipeline.parser import AddressParserService
+
+        model = fake_model(lambda address: {'StreetNumber': address.split()[0]})
+        mock_parser_class.return_value = model
+        svc = AddressParserService(extracted_by="tester", normalizer=TextNormalizer(), cache_size=10)
+
+        out_df = svc.parse(["123 Main St.", "123  MAIN ST", "9 Oak Rd"])
+        model.assert_called_once_with(["123 Main St.", "9 Oak Rd"], batch_size=32)
+        self.assertEqual(out_df["house_number"].tolist(), ["123", "123", "9"])
+        self.assertEqual(out_df["full_address"].tolist(), ["123 Main St.", "123  MAIN ST", "9 Oak Rd"])
+
+        # a later chunk reuses cached keys and only sends the new one
+        svc.parse(["123 main street", "5 Elm Ave"])
+        self.assertEqual(model.call_args.args[0], ["5 Elm Ave"])
+        self.assertEqual(model.call_count, 2)
+
+    @patch("pipeline.parser.AddressParser")
+    def test_low_confidence_key_reaches_fallback_once(self, mock_parser_class):
+        from pipeline.parser import AddressParserService
+
+        main = MagicMock(side_effect=lambda batch, **kw: [DummyProbParsed({'StreetName': 'guess'}, [0.4])
+                                                          for _ in batch])
+        fallback = MagicMock(side_effect=lambda batch, **kw: [DummyProbParsed({'StreetName': 'main st'}, [0.95])
+                                                              for _ in batch])
+        mock_parser_class.side_effect = [main, fallback]
+        svc = AddressParserService(extracted_by="tester", with_prob=True, confidence_threshold=0.9,
+                                   fallback_model="bpemb", normalizer=TextNormalizer(), cache_size=10)
+
+        out_df = svc.parse(["1 Main St", "1 main st.", "1 MAIN STREET"])
+        main.assert_called_once_with(["1 Main St"], batch_size=32, with_prob=True)
+        fallback.assert_called_once_with(["1 Main St"], batch_size=32, with_prob=True)
+        self.assertEqual(out_df["road"].tolist(), ["main st"] * 3)
+
+        # the cache holds the fallback's result, so a later hit goes to neither model
+        out_df = svc.parse(["1 Main Street"])
+        self.assertEqual((main.call_count, fallback.call_count), (1, 1))
+        self.assertEqual(out_df["road"].tolist(), ["main st"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,6 +3,7 @@ import tempfile
 import shutil
 import pandas as pd
 from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock
 
 from pipeline.parser import AddressParserService
@@ -16,6 +17,17 @@ class DummyParsed:
         return self._d
 
 
+class DummyProbParsed(DummyParsed):
+    def __init__(self, d, probs):
+        super().__init__(d)
+        self.address_parsed_components = [(f"tok{i}", ("StreetName", p)) for i, p in enumerate(probs)]
+
+
+def fake_model(parse=lambda address: {}):
+    """Stands in for the Deepparse model; ``parse`` maps each address of a batch to its tags."""
+    return MagicMock(side_effect=lambda batch, **kw: [DummyParsed(parse(a)) for a in batch])
+
+
 class TestAddressParserService(unittest.TestCase):
     def setUp(self):
         self.tmp_dir = tempfile.mkdtemp()
@@ -54,6 +66,163 @@ class TestAddressParserService(unittest.TestCase):
         self.assertTrue(Path(out_path).exists())
         self.assertTrue(str(out_path).endswith('.xlsx'))
 
+    @patch("pipeline.parser.AddressParser")
+    def test_parse_dataframe_in_memory(self, mock_parser_class):
+        # deepparse unwraps a one-element list, and blank addresses are never sent
+        mock_parser = MagicMock()
+        mock_parser.return_value = DummyParsed({'StreetNumber': '12', 'Province': 'ON'})
+        mock_parser_class.return_value = mock_parser
+
+        svc = AddressParserService(extracted_by='tester')
+        df = pd.DataFrame({
+            'ID': ['1', '2'],
+            'ADDRESSLINE1': ['12 King St', ''],
+            'ADDRESSLINE2': ['Toronto', ''],
+            'ADDRESSLINE3': ['', ''],
+        })
+        out_df = svc.parse_dataframe(df, source='api', ts='t0')
+
+        mock_parser.assert_called_once_with(['12 King St, Toronto'], batch_size=32)
+        self.assertEqual(list(out_df['status']), ['PARTIAL', 'INVALID'])
+        self.assertEqual(out_df.loc[0, 'house_number'], '12')
+        self.assertEqual(out_df.loc[0, 'country'], 'CA')
+        self.assertEqual(out_df.loc[0, 'filename'], 'api_t0')
+
+    @patch("pipeline.parser.AddressParser")
+    def test_iter_parse_chunks_iterable_without_disk(self, mock_parser_class):
+        mock_parser = MagicMock()
+        mock_parser.side_effect = lambda addrs, **kw: [DummyParsed({}) for _ in addrs]
+        mock_parser_class.return_value = mock_parser
+
+        svc = AddressParserService(extracted_by='tester')
+        rows = iter([
+            ('a', '1 A St', 'Town', 'US'),
+            {'ID': 'b', 'ADDRESSLINE1': '2 B St'},
+            '3 C St, Manchester M1 1AA',
+        ])
+        chunks = list(svc.iter_parse(rows, chunk_size=2, ts='t0'))
+
+        self.assertEqual([len(c) for c in chunks], [2, 1])
+        self.assertEqual(list(chunks[0]['ID']), ['a', 'b'])
+        self.assertEqual(chunks[0].loc[0, 'country'], 'USA')
+        self.assertEqual(chunks[1].loc[0, 'ID'], '2')
+        self.assertEqual(chunks[1].loc[0, 'country'], 'GB')
+        self.assertTrue(all((c['processed_timestamp'] == 't0').all() for c in chunks))
+
+    @patch("pipeline.parser.AddressParser")
+    def test_parse_as_arrow(self, mock_parser_class):
+        mock_parser = MagicMock()
+        mock_parser.side_effect = lambda addrs, **kw: [DummyParsed({}) for _ in addrs]
+        mock_parser_class.return_value = mock_parser
+
+        svc = AddressParserService(extracted_by='tester')
+        df = pd.DataFrame({
+            'ID': ['1', '2', '3'],
+            'ADDRESSLINE1': ['a', 'd', 'x'],
+            'ADDRESSLINE2': ['b', 'e', 'y'],
+            'ADDRESSLINE3': ['c', 'f', 'z']
+        })
+        table = svc.parse(df, chunk_size=2, as_arrow=True)
+        self.assertEqual(table.num_rows, 3)
+        self.assertIn('status', table.column_names)
+
+        batches = list(svc.iter_parse(df, chunk_size=2, as_arrow=True))
+        self.assertEqual([b.num_rows for b in batches], [2, 1])
+
+    @patch("pipeline.parser.AddressParser")
+    def test_result_is_columnar(self, mock_parser_class):
+        mock_parser = MagicMock()
+        mock_parser.side_effect = lambda addrs, **kw: [DummyParsed({'StreetName': 'Main St'}) for _ in addrs]
+        mock_parser_class.return_value = mock_parser
+
+        svc = AddressParserService(extracted_by='tester')
+        n = 2000
+        df = pd.DataFrame({
+            'ID': [str(i) for i in range(n)],
+            'ADDRESSLINE1': [f'{i} Main St' for i in range(n)],
+            'ADDRESSLINE2': ['Town'] * n,
+            'ADDRESSLINE3': ['US', 'CA'] * (n // 2),
+        })
+        out_df = svc.parse(df, chunk_size=500)
+
+        for col in ('country', 'status', 'extracted_by', 'filename'):
+            self.assertIsInstance(out_df[col].dtype, pd.CategoricalDtype, col)
+        self.assertEqual(out_df['road'].dtype, pd.StringDtype('pyarrow'))
+        self.assertEqual(set(out_df['country']), {'USA', 'CAN'})
+
+        columnar = out_df.memory_usage(deep=True).sum()
+        as_objects = out_df.astype(object).memory_usage(deep=True).sum()
+        self.assertLess(columnar, as_objects / 2)
+
+    @patch("pipeline.parser.AddressParser")
+    def test_low_confidence_rows_go_to_fallback(self, mock_parser_class):
+        main = MagicMock(return_value=[
+            DummyProbParsed({'StreetName': 'main st'}, [0.99, 0.97]),
+            DummyProbParsed({'StreetName': 'bad guess'}, [0.99, 0.40]),
+            DummyProbParsed({'StreetName': 'elm st'}, [0.95]),
+        ])
+        fallback = MagicMock(return_value=DummyProbParsed({'StreetName': 'good guess'}, [0.93]))
+        mock_parser_class.side_effect = [main, fallback]
+
+        svc = AddressParserService(
+            extracted_by='tester', with_prob=True, confidence_threshold=0.9, fallback_model='bpemb'
+        )
+        df = pd.DataFrame({
+            'ID': ['1', '2', '3'],
+            'ADDRESSLINE1': ['1 Main St', '2 ??', '3 Elm St'],
+            'ADDRESSLINE2': ['', '', ''],
+            'ADDRESSLINE3': ['', '', ''],
+        })
+        out_df = svc.parse_dataframe(df, source='api', ts='t0')
+
+        main.assert_called_once_with(['1 Main St', '2 ??', '3 Elm St'], batch_size=32, with_prob=True)
+        fallback.assert_called_once_with(['2 ??'], batch_size=32, with_prob=True)
+        mock_parser_class.assert_called_with(model_type='bpemb', attention_mechanism=True)
+        self.assertEqual(list(out_df['road']), ['main st', 'good guess', 'elm st'])
+        self.assertEqual([round(float(c), 2) for c in out_df['confidence']], [0.97, 0.93, 0.95])
+
+    @patch("pipeline.parser.AddressParser")
+    def test_no_confidence_column_by_default(self, mock_parser_class):
+        mock_parser_class.return_value = fake_model()
+        svc = AddressParserService(extracted_by='tester')
+        out_df = svc.parse(['1 Main St'])
+        self.assertNotIn('confidence', out_df.columns)
+        with self.assertRaises(ValueError):
+            AddressParserService(confidence_threshold=0.5)
+
+    @patch("pipeline.parser.AddressParser")
+    def test_parse_file_streams_chunks_to_output(self, mock_parser_class):
+        import pyarrow.parquet as pq
+
+        mock_parser_class.return_value = fake_model()
+        svc = AddressParserService(extracted_by='tester', output_format='parquet')
+        out_df, out_path = svc.parse_file(str(self.input_file), self.proc_dir, chunk_size=2)
+
+        self.assertTrue(out_path.endswith('.parquet'))
+        # one row group per parsed chunk
+        self.assertEqual(pq.ParquetFile(out_path).num_row_groups, 2)
+        self.assertEqual(pd.read_parquet(out_path)['ID'].tolist(), ['1', '2', '3'])
+        self.assertEqual(out_df['ID'].tolist(), ['1', '2', '3'])
+        self.assertEqual(sorted(p.name for p in Path(self.proc_dir).iterdir()), [Path(out_path).name])
+
+    @patch("pipeline.parser.AddressParser")
+    def test_from_config(self, mock_parser_class):
+        config = SimpleNamespace(
+            parser_with_prob=True, parser_confidence_threshold=0.8, parser_fallback_model='bpemb',
+            reference_postcode_path=None, reference_city_path=None,
+            normalize_enabled=True, normalize_expand_abbreviations=False, normalize_abbreviations={},
+            normalize_cache_size=5, output_format='csv',
+        )
+        svc = AddressParserService.from_config(config)
+        self.assertTrue(svc.with_prob)
+        self.assertEqual((svc.confidence_threshold, svc.fallback_model), (0.8, 'bpemb'))
+        self.assertEqual(svc.normalizer.abbreviations, {})
+        self.assertEqual((svc.cache_size, svc.output_format), (5, 'csv'))
+        self.assertIsNone(svc.batch_sizer)
+
+        config.normalize_enabled = False
+        self.assertIsNone(AddressParserService.from_config(config).normalizer)
+
     def test_parse_missing_file(self):
         svc = AddressParserService()
         with self.assertRaises(FileNotFoundError):
@@ -0,0 +1,102 @@
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from pipeline.archiver import Archiver
+from pipeline.flow import _process_file
+from pipeline.profiling import StageProfiler
+
+
+class ProfilingConfig:
+    profiling_enabled = False
+    profiling_sample_rate = 0.25
+    profiling_torch = False
+    profiling_interval_ms = 1
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+class TestStageProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_writes_pstats_and_collapsed_stacks_per_stage(self):
+        profile = StageProfiler(enabled=True, interval_ms=1).for_file("f.xlsx")
+        with profile.stage("parse", inference=True):
+            busy(0.05)
+        with profile.stage("save"):
+            busy(0.01)
+        with profile.stage("parse"):
+            busy(0.05)
+
+        processed = str(Path(self.tmp_dir) / "f_20250101T000000Z.xlsx")
+        written = StageProfiler.write(profile, processed)
+
+        out = Path(f"{processed}.profile")
+        self.assertCountEqual(
+            [Path(p).name for p in written],
+            ["parse.pstats", "parse.collapsed", "save.pstats", "save.collapsed"]
+        )
+        stats = pstats.Stats(str(out / "parse.pstats"))
+        self.assertTrue(any(func[2] == "busy" for func in stats.stats))
+        lines = (out / "parse.collapsed").read_text().splitlines()
+        self.assertTrue(lines)
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertIn("test_profiling.py:busy", stack)
+        self.assertGreater(int(count), 0)
+
+    def test_flow_writes_profile_next_to_archived_output(self):
+        base = Path(self.tmp_dir)
+        cfg = SimpleNamespace(processed_dir=str(base / "processed"))
+        for d in ("in", "processed"):
+            (base / d).mkdir()
+        (base / "in" / "f.xlsx").write_text("raw")
+        processed = base / "processed" / "f_ts.xlsx"
+        processed.write_text("out")
+        parser_svc = MagicMock()
+        parser_svc.parse_file.return_value = (MagicMock(), str(processed))
+        archiver = Archiver(str(base / "in"), str(base / "archive" / "in"), str(base / "archive" / "processed"))
+
+        _process_file("f.xlsx", cfg, MagicMock(), parser_svc, MagicMock(), archiver, MagicMock(),
+                      profiler=StageProfiler(enabled=True, interval_ms=1))
+
+        self.assertEqual(list((base / "processed").iterdir()), [])
+        out = base / "archive" / "processed" / "f_ts.xlsx.profile"
+        self.assertTrue((out / "archive.pstats").exists())
+        self.assertTrue((base / "archive" / "processed" / "f_ts.xlsx").exists())
+
+    def test_disabled_or_unsampled_files_cost_nothing(self):
+        self.assertEqual(StageProfiler().for_file("f").write(self.tmp_dir), [])
+        sampled = StageProfiler(enabled=True, sample_rate=0.25, rng=lambda: 0.5)
+        with sampled.for_file("f").stage("parse"):
+            pass
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def test_environment_overrides_config(self):
+        with patch.dict(os.environ, {"ISO_PROFILE": "1", "ISO_PROFILE_SAMPLE_RATE": "0.5"}):
+            profiler = StageProfiler.from_config(ProfilingConfig())
+        self.assertTrue(profiler.enabled)
+        self.assertEqual(profiler.sample_rate, 0.5)
+        self.assertFalse(profiler.use_torch)
+
+        with patch.dict(os.environ, {"ISO_PROFILE": "0"}):
+            cfg = ProfilingConfig()
+            cfg.profiling_enabled = True
+            self.assertFalse(StageProfiler.from_config(cfg).enabled)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+
+from pipeline.query import AddressQuery, apply_summary_delta
+from pipeline.repository import DatabaseRepository
+
+
+class DummyConfig:
+    def __init__(self, database_url: str, table_name: str):
+        self.database_url = database_url
+        self.table_name = table_name
+
+
+def rows(*specs):
+    return pd.DataFrame([
+        {"ID": i, "full_address": f"{i} Main St", "country": country, "filename": filename,
+         "processed_timestamp": "t", "status": status}
+        for i, country, status, filename in specs
+    ])
+
+
+class TestAddressQuery(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.config = DummyConfig(f"sqlite:///{Path(self.tmpdir) / 'test.db'}", "iso_address")
+        self.repo = DatabaseRepository(self.config)
+        self.query = AddressQuery(self.repo.engine, self.config.table_name)
+
+    def tearDown(self):
+        self.repo.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def _recount(self):
+        with self.repo.engine.connect() as conn:
+            return pd.read_sql(text(
+                "SELECT COALESCE(country, '') AS country, status, filename, COUNT(*) AS row_count "
+                "FROM iso_address GROUP BY 1, 2, 3 ORDER BY 1, 2, 3"
+            ), conn)
+
+    def test_lookups(self):
+        self.repo.save(rows(("a", "US", "PERFECT", "f1"), ("b", "GB", "PARTIAL", "f1")))
+        self.repo.save(rows(("a", "CA", "PERFECT", "f2")))
+
+        self.assertEqual(self.query.get("a")["country"], "CA")
+        self.assertIsNone(self.query.get("missing"))
+        many = self.query.get_many(["b", "a", "missing", "a"])
+        self.assertEqual(sorted(many["id"]), ["a", "b"])
+        self.assertEqual(self.query.get_many([]).shape[0], 0)
+        self.assertEqual(self.query.latest()["id"].tolist(), ["a", "b"])
+
+    def test_latest_view_keeps_newest_row_of_each_id(self):
+        # the JDBC backend or manual loads can leave several rows for one id
+        with self.repo.engine.begin() as conn:
+            for country in ("US", "CA"):
+                conn.execute(text(
+                    "INSERT INTO iso_address (id, country, status) VALUES ('dup', :c, 'PERFECT')"
+                ), {"c": country})
+        self.assertEqual(self.query.latest()["country"].tolist(), ["CA"])
+        self.assertEqual(self.query.get("dup")["country"], "CA")
+
+    def test_summary_tracks_saves_incrementally(self):
+        self.repo.save(rows(("a", "US", "PERFECT", "f1"), ("b", "US", "PERFECT", "f1"),
+                            ("c", None, "FAILED", "f1")))
+        # reprocessing moves "a" to another file and status, and "b" away from the US
+        self.repo.save(rows(("a", "US", "PARTIAL", "f2"), ("b", "GB", "PERFECT", "f2")))
+
+        summary = self.query.summary()
+        pd.testing.assert_frame_equal(summary, self._recount())
+        self.assertEqual(
+            self.query.summary(by="filename").set_index("filename")["row_count"].to_dict(),
+            {"f1": 1, "f2": 2},
+        )
+        with self.assertRaises(ValueError):
+            self.query.summary(by=["city"])
+
+    def test_summary_is_backfilled_for_existing_table(self):
+        self.repo.save(rows(("a", "US", "PERFECT", "f1")))
+        with self.repo.engine.begin() as conn:
+            conn.execute(text("DROP TABLE iso_address_summary"))
+        repo = DatabaseRepository(self.config)
+        self.assertEqual(AddressQuery(repo.engine).summary()["row_count"].tolist(), [1])
+        repo.engine.dispose()
+
+    def test_summary_is_backfilled_when_query_opens_first(self):
+        self.repo.save(rows(("a", "US", "PERFECT", "f1"), ("b", "US", "PERFECT", "f1")))
+        with self.repo.engine.begin() as conn:
+            conn.execute(text("DROP TABLE iso_address_summary"))
+        self.assertEqual(AddressQuery(self.repo.engine).summary()["row_count"].tolist(), [2])
+
+    def test_get_many_uses_the_id_index(self):
+        self.repo.save(rows(("a", "US", "PERFECT", "f1"), ("b", "GB", "PARTIAL", "f1")))
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT a.*"):
+                statements.append((statement, parameters))
+
+        event.listen(self.repo.engine, "before_cursor_execute", capture)
+        try:
+            self.query.get_many(["a", "b"])
+        finally:
+            event.remove(self.repo.engine, "before_cursor_execute", capture)
+
+        (statement, parameters), = statements
+        with self.repo.engine.connect() as conn:
+            plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        self.assertTrue(all("SCAN" not in step for step in plan), plan)
+        self.assertTrue(any("ix_iso_address_id" in step for step in plan), plan)
+
+    def test_concurrent_insert_of_same_group_falls_back_to_update(self):
+        class RacingConn:
+            # reports a missed UPDATE once, as if another writer inserted the group meanwhile
+            def __init__(self, conn):
+                self.conn = conn
+                self.raced = False
+
+            def execute(self, stmt, params=None):
+                if not self.raced and str(stmt).startswith("UPDATE"):
+                    self.raced = True
+                    return MagicMock(rowcount=0)
+                return self.conn.execute(stmt, params)
+
+            def begin_nested(self):
+                return self.conn.begin_nested()
+
+        self.repo.save(rows(("a", "US", "PERFECT", "f1")))
+        with self.repo.engine.begin() as conn:
+            apply_summary_delta(RacingConn(conn), {}, {("US", "PERFECT", "f1"): 2})
+        self.assertEqual(self.query.summary()["row_count"].tolist(), [3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import pickle
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import numpy as np
+import pandas as pd
+
+from pipeline.refdata import ReferenceTable, compile_reference_table, compile_csv
+from tests.test_parser import DummyParsed
+
+
+class TestReferenceTable(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = str(Path(self.tmp_dir) / "city.refdata")
+        compile_reference_table([
+            ("Springfield", "IL", "US"),
+            ("Toronto", "ON", "CA"),
+            ("  springfield ", "MA", "US"),  # duplicate after normalization: first wins
+            ("Manchester", "", "GB"),
+        ], self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_vectorized_lookup_is_normalized(self):
+        table = ReferenceTable(self.path)
+        self.assertEqual(len(table), 3)
+
+        regions, countries = table.lookup(["TORONTO", "springfield", "Atlantis", None, "manchester"])
+        self.assertEqual(list(regions), ["ON", "IL", "", "", ""])
+        self.assertEqual(list(countries), ["CA", "US", "", "", "GB"])
+
+    def test_tables_are_memory_mapped_and_picklable(self):
+        table = ReferenceTable(self.path)
+        self.assertIsInstance(table._hashes, np.memmap)
+
+        clone = pickle.loads(pickle.dumps(table))
+        self.assertEqual(clone.path, table.path)
+        self.assertEqual(list(clone.lookup(["Toronto"])[1]), ["CA"])
+
+    def test_compile_from_csv(self):
+        csv_path = Path(self.tmp_dir) / "postcodes.csv"
+        pd.DataFrame({
+            "postcode": ["M5V 2T6", "90210"], "state": ["ON", "CA"], "iso": ["CA", "US"]
+        }).to_csv(csv_path, index=False)
+        out = str(Path(self.tmp_dir) / "postcode.refdata")
+
+        self.assertEqual(compile_csv(str(csv_path), out, "postcode", "state", "iso"), 2)
+        self.assertEqual(list(ReferenceTable(out).lookup(["m5v  2t6"])[0]), ["ON"])
+
+    def test_rejects_foreign_file(self):
+        bad = Path(self.tmp_dir) / "bad.refdata"
+        bad.write_bytes(b"not a table" * 10)
+        with self.assertRaises(ValueError):
+            ReferenceTable(str(bad))
+
+    @patch("pipeline.parser.AddressParser")
+    def test_parser_fills_missing_state_and_country(self, mock_parser_class):
+        from pipeline.parser import AddressParserService
+
+        mock_parser_class.return_value = MagicMock(return_value=[
+            DummyParsed({'Municipality': 'toronto'}),
+            DummyParsed({'Municipality': 'springfield', 'Province': 'TX'}),
+            DummyParsed({'Municipality': 'nowhere'}),
+        ])
+        svc = AddressParserService(extracted_by='tester', city_table=self.path)
+        out_df = svc.parse(['1 King St Toronto', '2 Elm St Springfield', '3 Nowhere Rd'])
+
+        self.assertEqual(list(out_df['state']), ['ON', 'TX', ''])
+        self.assertEqual(list(out_df['country']), ['CA', 'US', ''])
+
+    @patch("pipeline.parser.AddressParser")
+    def test_parser_falls_through_to_city_table(self, mock_parser_class):
+        from pipeline.parser import AddressParserService
+
+        postcodes = str(Path(self.tmp_dir) / "postcode.refdata")
+        compile_reference_table([("90210", "CA", "US")], postcodes)
+        mock_parser_class.return_value = MagicMock(return_value=[
+            DummyParsed({'Municipality': 'toronto'}),
+            DummyParsed({'Municipality': 'nowhere', 'PostalCode': '90210'}),
+        ])
+        svc = AddressParserService(extracted_by='tester', postcode_table=postcodes, city_table=self.path)
+
+        # the first address has no postcode, so only the city table can fill it
+        out_df = svc.parse(['1 King St Toronto', '2 Elm St Nowhere 90210'])
+        self.assertEqual(list(out_df['state']), ['ON', 'CA'])
+        self.assertEqual(list(out_df['country']), ['CA', 'US'])
+
+        # no address has a postcode at all
+        mock_parser_class.return_value.return_value = [DummyParsed({'Municipality': 'toronto'})]
+        out_df = svc.parse(['1 King St Toronto'])
+        self.assertEqual(list(out_df['state']), ['ON'])
+        self.assertEqual(list(out_df['country']), ['CA'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, inspect, text
 from pipeline.schema import create_iso_address_table
 
 
@@ -29,6 +29,7 @@ class TestCreateIsoAddressTable(unittest.TestCase):
             "processed_timestamp",
             "extracted_by",
             "status",
+            "confidence",
         ]
 
         self.assertCountEqual(cols, expected)
@@ -54,6 +55,7 @@ class TestCreateIsoAddressTable(unittest.TestCase):
             "filename",
             "processed_timestamp",
             "extracted_by",
+            "confidence",
         ]:
             self.assertTrue(col_map[name]["nullable"], f"{name} should be nullable")
 
@@ -64,6 +66,19 @@ class TestCreateIsoAddressTable(unittest.TestCase):
         col = next(c for c in self.inspector.get_columns("iso_address") if c["name"] == "record_id")
         self.assertIn(col.get("autoincrement"), (None, True, "auto"))
 
+    def test_adds_columns_missing_from_older_table(self):
+        engine = create_engine("sqlite:///:memory:")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE iso_address (record_id INTEGER PRIMARY KEY, id VARCHAR(36), "
+                "status VARCHAR(16) NOT NULL)"
+            ))
+        create_iso_address_table(engine)
+        cols = [c["name"] for c in inspect(engine).get_columns("iso_address")]
+        self.assertIn("confidence", cols)
+        self.assertIn("full_address", cols)
+        self.assertIn("ix_iso_address_id", [i["name"] for i in inspect(engine).get_indexes("iso_address")])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from pipeline.service import MicroBatcher, ParsingService, main
+
+
+class FakeParserService:
+    def __init__(self):
+        self.batch_sizes = []
+
+    def parse(self, rows, source, ts=None):
+        df = pd.DataFrame(rows)
+        self.batch_sizes.append(len(df))
+        return pd.DataFrame({
+            'ID': df['ID'].astype(str),
+            'full_address': df['ADDRESSLINE1'],
+            'status': 'PERFECT',
+            'source': source,
+        })
+
+
+async def _http(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n"
+        f"Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, data = raw.partition(b'\r\n\r\n')
+    status = int(head.split(b' ')[1])
+    return status, json.loads(data)
+
+
+class TestMicroBatcher(unittest.TestCase):
+    def test_concurrent_submits_are_coalesced(self):
+        handler = MagicMock(side_effect=lambda items: [i * 2 for i in items])
+
+        async def run():
+            batcher = MicroBatcher(handler, max_batch_size=10, max_latency_ms=50)
+            await batcher.start()
+            try:
+                return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+            finally:
+                await batcher.stop()
+
+        results = asyncio.run(run())
+        self.assertEqual(results, [0, 2, 4, 6, 8])
+        handler.assert_called_once_with([0, 1, 2, 3, 4])
+
+    def test_batch_size_limit_splits_batches(self):
+        handler = MagicMock(side_effect=lambda items: list(items))
+
+        async def run():
+            batcher = MicroBatcher(handler, max_batch_size=2, max_latency_ms=50)
+            await batcher.start()
+            try:
+                return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+            finally:
+                await batcher.stop()
+
+        self.assertEqual(asyncio.run(run()), [0, 1, 2, 3, 4])
+        self.assertEqual([len(c.args[0]) for c in handler.call_args_list], [2, 2, 1])
+
+    def test_handler_error_is_propagated(self):
+        async def run():
+            batcher = MicroBatcher(MagicMock(side_effect=ValueError("boom")), max_latency_ms=1)
+            await batcher.start()
+            try:
+                await batcher.submit(1)
+            finally:
+                await batcher.stop()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+
+    def test_failing_item_does_not_fail_its_batch(self):
+        def handler(items):
+            if 'bad' in items:
+                raise ValueError('cannot parse bad')
+            return [f'parsed {i}' for i in items]
+
+        handler_mock = MagicMock(side_effect=handler)
+
+        async def run():
+            batcher = MicroBatcher(handler_mock, max_batch_size=10, max_latency_ms=50)
+            await batcher.start()
+            try:
+                return await asyncio.gather(*(batcher.submit(i) for i in ('a', 'bad', 'c')),
+                                            return_exceptions=True)
+            finally:
+                await batcher.stop()
+
+        ok_a, bad, ok_c = asyncio.run(run())
+        self.assertEqual((ok_a, ok_c), ('parsed a', 'parsed c'))
+        self.assertIsInstance(bad, ValueError)
+        self.assertEqual([c.args[0] for c in handler_mock.call_args_list], [['a', 'bad', 'c'], ['a'], ['bad'], ['c']])
+
+
+async def _raw_http(port, request: bytes):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    return int(raw.split(b' ')[1])
+
+
+class TestParsingService(unittest.TestCase):
+    def test_single_and_batch_endpoints(self):
+        fake = FakeParserService()
+
+        async def run():
+            service = ParsingService(fake, port=0, max_batch_size=8, max_latency_ms=50)
+            await service.start()
+            try:
+                singles = await asyncio.gather(*(
+                    _http(service.port, 'POST', '/parse', {'ID': i, 'ADDRESSLINE1': f'{i} Main St'})
+                    for i in range(3)
+                ))
+                batch = await _http(service.port, 'POST', '/parse/batch', [
+                    {'ID': 'a', 'ADDRESSLINE1': '1 A St'},
+                    {'ID': 'b', 'ADDRESSLINE1': '2 B St'},
+                ])
+                health = await _http(service.port, 'GET', '/health')
+                missing = await _http(service.port, 'GET', '/nope')
+                bad = await _http(service.port, 'POST', '/parse', ['not', 'an', 'object'])
+                return singles, batch, health, missing, bad
+            finally:
+                await service.stop()
+
+        singles, batch, health, missing, bad = asyncio.run(run())
+
+        self.assertEqual(sorted(r['ID'] for _, r in singles), ['0', '1', '2'])
+        self.assertTrue(all(status == 200 for status, _ in singles))
+        self.assertEqual(fake.batch_sizes[0], 3)
+
+        status, payload = batch
+        self.assertEqual(status, 200)
+        self.assertEqual([r['ID'] for r in payload['results']], ['a', 'b'])
+
+        self.assertEqual(health, (200, {'status': 'ok'}))
+        self.assertEqual(missing[0], 404)
+        self.assertEqual(bad[0], 400)
+
+    def test_invalid_content_length_is_rejected(self):
+        async def run():
+            service = ParsingService(FakeParserService(), port=0)
+            await service.start()
+            try:
+                return [
+                    await _raw_http(service.port, f"POST /parse HTTP/1.1\r\nContent-Length: {value}\r\n\r\n".encode())
+                    for value in ('-5', 'abc')
+                ]
+            finally:
+                await service.stop()
+
+        self.assertEqual(asyncio.run(run()), [400, 400])
+
+    @patch('pipeline.service.asyncio.run')
+    @patch('pipeline.service.ParsingService')
+    @patch('pipeline.service.AddressParserService')
+    @patch('pipeline.service.Config')
+    def test_main_builds_parser_from_config(self, mock_config, mock_parser, mock_service, mock_run):
+        with patch('sys.argv', ['service']), patch('builtins.print'):
+            main()
+        mock_parser.from_config.assert_called_once_with(mock_config.return_value)
+        self.assertIs(mock_service.call_args.args[0], mock_parser.from_config.return_value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+from pipeline.tuning import AdaptiveBatchSizer, current_rss_mb
+from tests.test_parser import fake_model
+
+
+class DummyConfig:
+    def __init__(self, database_url: str, table_name: str):
+        self.database_url = database_url
+        self.table_name = table_name
+
+
+class TestAdaptiveBatchSizer(unittest.TestCase):
+    def sizer(self, rss=100.0, **kwargs):
+        params = dict(initial=100, min_size=10, max_size=1000, target_seconds=1.0, memory_limit_mb=1000)
+        params.update(kwargs)
+        return AdaptiveBatchSizer('test', rss_probe=lambda: rss, **params)
+
+    def test_grows_towards_target_at_most_doubling(self):
+        sizer = self.sizer()
+        self.assertEqual(sizer.record(100, 0.1), 200)   # 1 ms/row wants 1000
+        self.assertEqual(sizer.record(200, 0.2), 400)
+        self.assertEqual(sizer.record(400, 0.4), 800)
+        self.assertEqual(sizer.record(800, 0.8), 1000)  # capped at max_size
+
+    def test_shrinks_when_slow_but_not_below_min(self):
+        sizer = self.sizer()
+        self.assertEqual(sizer.record(100, 10.0), 50)
+        for _ in range(10):
+            sizer.record(sizer.size, sizer.size * 0.1)
+        self.assertEqual(sizer.size, 10)
+
+    def test_memory_ceiling_halves_and_headroom_blocks_growth(self):
+        self.assertEqual(self.sizer(rss=950).record(100, 0.01), 50)
+        self.assertEqual(self.sizer(rss=800).record(100, 0.01), 100)
+
+    def test_history_records_every_decision(self):
+        sizer = self.sizer()
+        sizer.record(100, 0.1)
+        sizer.record(0, 0.0)  # ignored
+        sizer.record(200, 0.2)
+        self.assertEqual([h['next_size'] for h in sizer.history], [200, 400])
+        self.assertEqual(sizer.history[0]['reason'], 'latency')
+
+    def test_rejects_inconsistent_bounds(self):
+        with self.assertRaises(ValueError):
+            AdaptiveBatchSizer('bad', initial=5, min_size=10, max_size=100)
+
+    def test_reads_current_rss(self):
+        self.assertGreater(current_rss_mb(), 0)
+
+    @patch("pipeline.parser.AddressParser")
+    def test_parser_calls_model_in_sized_batches(self, mock_parser_class):
+        from pipeline.parser import AddressParserService
+
+        model = fake_model(lambda address: {'StreetNumber': '1'})
+        mock_parser_class.return_value = model
+        sizer = self.sizer(initial=2, min_size=1, max_size=4, target_seconds=60)
+        svc = AddressParserService(extracted_by='tester', batch_sizer=sizer)
+
+        out_df = svc.parse([f'{i} Main St' for i in range(9)])
+
+        self.assertEqual([len(c.args[0]) for c in model.call_args_list], [2, 4, 3])
+        # each sized batch is a single forward pass
+        self.assertEqual([c.kwargs['batch_size'] for c in model.call_args_list], [2, 4, 3])
+        self.assertEqual(list(out_df['house_number']), ['1'] * 9)
+        self.assertEqual(len(sizer.history), 3)
+
+    def test_repository_inserts_in_sized_chunks(self):
+        from pipeline.repository import DatabaseRepository
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            url = f"sqlite:///{Path(tmpdir) / 'test.db'}"
+            sizer = self.sizer(initial=3, min_size=3, max_size=3)
+            repo = DatabaseRepository(DummyConfig(url, "iso_address"), chunk_sizer=sizer)
+            repo.save(pd.DataFrame({
+                'ID': [str(i) for i in range(10)], 'full_address': ['x'] * 10, 'status': ['PERFECT'] * 10
+            }))
+
+            self.assertEqual([h['rows'] for h in sizer.history], [3, 3, 3, 1])
+            engine = create_engine(url)
+            with engine.begin() as conn:
+                self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM iso_address")).scalar(), 10)
+            engine.dispose()
+            repo.engine.dispose()
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from pipeline.watcher import DirectoryWatcher
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+    use_inotify = False
+
+    def setUp(self):
+        self.watch_dir = tempfile.mkdtemp()
+        self.watcher = DirectoryWatcher(
+            self.watch_dir, poll_interval=0.05, settle_seconds=0.3, use_inotify=self.use_inotify
+        )
+        self.yielded = []
+        self.yield_times = {}
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+
+    def tearDown(self):
+        self.watcher.stop()
+        self._thread.join(timeout=5)
+        shutil.rmtree(self.watch_dir)
+
+    def _consume(self):
+        for name in self.watcher:
+            self.yielded.append(name)
+            self.yield_times[name] = time.monotonic()
+
+    def _wait_for(self, count, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while len(self.yielded) < count and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    def test_existing_and_new_files_are_yielded_once(self):
+        Path(self.watch_dir, "existing.xlsx").write_text("x")
+        self._thread.start()
+        self._wait_for(1)
+
+        Path(self.watch_dir, "new.xlsx").write_text("y")
+        Path(self.watch_dir, "notes.txt").write_text("ignored")
+        Path(self.watch_dir, "~$new.xlsx").write_text("lock file")
+        self._wait_for(2)
+        time.sleep(0.5)
+
+        self.assertEqual(self.yielded, ["existing.xlsx", "new.xlsx"])
+
+    def test_file_still_being_written_waits_to_settle(self):
+        self._thread.start()
+        path = Path(self.watch_dir, "big.xlsx")
+        with open(path, "wb") as f:
+            for _ in range(5):
+                time.sleep(0.1)
+                f.write(b"chunk")
+                f.flush()
+                os.fsync(f.fileno())
+        finished = time.monotonic()
+
+        self._wait_for(1)
+        self.assertEqual(self.yielded, ["big.xlsx"])
+        self.assertGreaterEqual(self.yield_times["big.xlsx"] - finished, 0.25)
+
+    def test_file_dropped_again_after_archive_is_yielded_again(self):
+        path = Path(self.watch_dir, "monthly.xlsx")
+        path.write_text("v1")
+        self._thread.start()
+        self._wait_for(1)
+
+        path.unlink()
+        time.sleep(0.2)
+        path.write_text("version 2")
+        self._wait_for(2)
+
+        self.assertEqual(self.yielded, ["monthly.xlsx", "monthly.xlsx"])
+
+    def test_identical_file_dropped_again_is_yielded_again(self):
+        # a re-drop with the same size and mtime (e.g. ``cp -p``) must not look already handled
+        path = Path(self.watch_dir, "monthly.xlsx")
+        path.write_text("same")
+        os.utime(path, ns=(10 ** 18, 10 ** 18))
+        self._thread.start()
+        self._wait_for(1)
+
+        path.unlink()
+        time.sleep(0.2)
+        self.assertNotIn("monthly.xlsx", self.watcher._seen)
+        path.write_text("same")
+        os.utime(path, ns=(10 ** 18, 10 ** 18))
+        self._wait_for(2)
+
+        self.assertEqual(self.yielded, ["monthly.xlsx", "monthly.xlsx"])
+
+    def test_failed_file_is_retried_with_backoff(self):
+        self.watcher.retry_backoff = 0.2
+        attempts = []
+
+        def consume():
+            for name in self.watcher:
+                attempts.append(time.monotonic())
+                if len(attempts) < 3:
+                    # e.g. the database was briefly down
+                    self.watcher.retry(name)
+                else:
+                    self.yielded.append(name)
+
+        self._thread = threading.Thread(target=consume, daemon=True)
+        Path(self.watch_dir, "stuck.xlsx").write_text("x")
+        self._thread.start()
+        self._wait_for(1)
+
+        self.assertEqual(self.yielded, ["stuck.xlsx"])
+        self.assertEqual(len(attempts), 3)
+        # the delay doubles after each failure, and the retried file settles again
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.2)
+        self.assertGreaterEqual(attempts[2] - attempts[1], 0.4)
+        self.assertNotIn("stuck.xlsx", self.watcher._retry_at)
+
+
+@unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+class TestDirectoryWatcherInotify(TestDirectoryWatcher):
+    use_inotify = True
+
+    def test_missed_events_are_caught_by_rescan(self):
+        # as if every event were lost (queue overflow, network filesystem)
+        with patch("pipeline.watcher._Inotify.read", lambda inotify, timeout: time.sleep(timeout) or []):
+            self._thread.start()
+            time.sleep(0.1)
+            Path(self.watch_dir, "late.xlsx").write_text("x")
+            self._wait_for(1)
+        self.assertEqual(self.yielded, ["late.xlsx"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from pipeline.work_queue import WorkQueue, Heartbeat, DONE, FAILED
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestWorkQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{Path(self.tmpdir) / 'queue.db'}")
+        self.clock = FakeClock()
+        self.queue = WorkQueue(self.engine, lease_seconds=60, max_attempts=2, clock=self.clock)
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmpdir)
+
+    def test_enqueue_splits_into_shards_once(self):
+        self.assertEqual(self.queue.enqueue_file("big.xlsx", total_rows=250, shard_rows=100), 3)
+        self.assertEqual(self.queue.enqueue_file("big.xlsx", total_rows=250, shard_rows=100), 0)
+
+        shards = [self.queue.claim("w1") for _ in range(3)]
+        self.assertEqual([(s.row_start, s.row_end) for s in shards], [(0, 100), (100, 200), (200, 250)])
+        self.assertIsNone(self.queue.claim("w2"))
+
+    def test_workers_get_distinct_shards(self):
+        self.queue.enqueue_file("f.xlsx", total_rows=40, shard_rows=1)
+        claimed, lock = [], threading.Lock()
+
+        def worker(name):
+            engine = create_engine(f"sqlite:///{Path(self.tmpdir) / 'queue.db'}",
+                                   connect_args={"timeout": 30})
+            queue = WorkQueue(engine, lease_seconds=60, clock=self.clock)
+            while (shard := queue.claim(name)) is not None:
+                with lock:
+                    claimed.append(shard.task_id)
+            engine.dispose()
+
+        threads = [threading.Thread(target=worker, args=(f"w{i}",)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(claimed), 40)
+        self.assertEqual(len(set(claimed)), 40)
+
+    def test_expired_lease_is_reclaimed_and_heartbeat_extends(self):
+        self.queue.enqueue_file("f.xlsx", total_rows=10, shard_rows=10)
+        shard = self.queue.claim("dead-worker")
+
+        self.clock.now += 30
+        self.assertIsNone(self.queue.claim("w2"))
+        self.assertTrue(self.queue.heartbeat(shard, "dead-worker"))
+
+        self.clock.now += 61
+        retaken = self.queue.claim("w2")
+        self.assertEqual(retaken.task_id, shard.task_id)
+        self.assertEqual(retaken.attempts, 2)
+
+        # the original owner can neither renew nor complete any more
+        self.assertFalse(self.queue.heartbeat(shard, "dead-worker"))
+        self.assertFalse(self.queue.complete(shard, "dead-worker"))
+        self.assertTrue(self.queue.complete(retaken, "w2"))
+
+    def test_shard_fails_after_max_attempts(self):
+        self.queue.enqueue_file("f.xlsx", total_rows=10, shard_rows=10)
+        for _ in range(2):
+            self.assertIsNotNone(self.queue.claim("w"))
+            self.clock.now += 61
+        self.assertIsNone(self.queue.claim("w"))
+        self.assertEqual(self.queue.counts(), {FAILED: 1})
+
+    def test_single_archiver_once_all_shards_done(self):
+        self.queue.enqueue_file("f.xlsx", total_rows=20, shard_rows=10)
+        first, second = self.queue.claim("w1"), self.queue.claim("w2")
+
+        self.queue.complete(first, "w1")
+        self.assertFalse(self.queue.begin_archive("f.xlsx"))
+
+        self.queue.complete(second, "w2")
+        self.assertEqual(self.queue.counts(), {DONE: 2})
+        self.assertTrue(self.queue.begin_archive("f.xlsx"))
+        self.assertFalse(self.queue.begin_archive("f.xlsx"))
+        self.queue.end_archive("f.xlsx")
+
+        # the same name dropped again later is a new file
+        self.assertEqual(self.queue.enqueue_file("f.xlsx", total_rows=5, shard_rows=10), 1)
+
+    def test_heartbeat_thread_renews_lease(self):
+        self.queue.enqueue_file("f.xlsx", total_rows=10, shard_rows=10)
+        shard = self.queue.claim("w1")
+        renewed = threading.Event()
+        original = self.queue.heartbeat
+
+        def heartbeat(s, w):
+            renewed.set()
+            return original(s, w)
+
+        self.queue.heartbeat = heartbeat
+        with Heartbeat(self.queue, shard, "w1", interval=0.01) as beat:
+            self.assertTrue(renewed.wait(2))
+        self.assertFalse(beat.lost)
+
+
+if __name__ == "__main__":
+    unittest.main()
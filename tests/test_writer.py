@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.writer import open_writer, output_path
+
+
+def chunk(ids, status):
+    return pd.DataFrame({
+        "ID": ids,
+        "full_address": [f"{i} Main St" if i != "3" else None for i in ids],
+        "status": pd.Categorical([status] * len(ids)),
+    })
+
+
+class TestChunkWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _read(self, path):
+        if path.endswith(".parquet"):
+            df = pd.read_parquet(path)
+        elif path.endswith(".csv"):
+            df = pd.read_csv(path, dtype={"ID": str})
+        else:
+            df = pd.read_excel(path, dtype={"ID": str})
+        return df.astype(object).where(df.notna(), None)
+
+    def test_chunks_are_appended_and_renamed_into_place(self):
+        expected = pd.DataFrame({
+            "ID": ["1", "2", "3"], "full_address": ["1 Main St", "2 Main St", None],
+            "status": ["PERFECT", "PERFECT", "PARTIAL"],
+        })
+        for fmt in ("xlsx", "csv", "parquet"):
+            path = str(Path(self.tmp_dir) / f"out.{fmt}")
+            with open_writer(path) as writer:
+                writer.write(chunk(["1", "2"], "PERFECT"))
+                # the output only appears once it is complete
+                self.assertFalse(os.path.exists(path))
+                writer.write(chunk(["3"], "PARTIAL"))
+            self.assertEqual(writer.rows, 3)
+            result = self._read(path)
+            pd.testing.assert_frame_equal(result, expected, check_dtype=False, obj=fmt)
+        self.assertEqual([p.name for p in Path(self.tmp_dir).iterdir() if p.name.startswith(".")], [])
+
+    def test_failure_leaves_no_file(self):
+        path = str(Path(self.tmp_dir) / "out.parquet")
+        with self.assertRaises(RuntimeError):
+            with open_writer(path) as writer:
+                writer.write(chunk(["1"], "PERFECT"))
+                raise RuntimeError("parse failed")
+        self.assertEqual(list(Path(self.tmp_dir).iterdir()), [])
+
+    def test_output_path_and_unknown_format(self):
+        self.assertEqual(
+            output_path("/p", "in.xlsx", "2024-01-02T03:04:05Z"), str(Path("/p") / "in_20240102T030405Z.xlsx")
+        )
+        self.assertTrue(output_path("/p", "in.xlsx", "t", "parquet").endswith("in_t.parquet"))
+        with self.assertRaises(ValueError):
+            open_writer(str(Path(self.tmp_dir) / "out.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import datetime
+import os
+import re
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+from pipeline.extractor import ExcelExtractor
+from pipeline.xlsx_reader import (
+    DEFAULT_BLOCK_BYTES, DEFAULT_SHARD_BYTES, count_xlsx_rows, read_xlsx, read_xlsx_chunks, read_xlsx_rows
+)
+
+_WORKBOOK = (
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Data" sheetId="1" r:id="rId7"/></sheets></workbook>'
+)
+_RELS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId7" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/data.xml"/></Relationships>'
+)
+_SHARED = (
+    '<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<si><t>ID</t></si><si><t>ADDRESSLINE1</t></si>'
+    '<si><r><t>12 King </t></r><r><t>St</t></r><rPh><t>x</t></rPh></si>'
+    '<si><t>Toronto &amp; Co</t></si></sst>'
+)
+_SHEET = (
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="C1" t="s"><v>1</v></c></row>'
+    '<row r="2"><c r="A2"><v>1</v></c><c r="C2" t="s"><v>2</v></c></row>'
+    '<row r="3"><c r="A3"><v>2.5</v></c><c r="B3" t="inlineStr"><is><t>skip</t></is></c>'
+    '<c r="C3" t="s"><v>3</v></c></row>'
+    '<row r="5"><c r="A5" t="str"><v>A-3</v></c></row>'
+    '</sheetData></worksheet>'
+)
+
+
+class TestXlsxReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_reads_shared_strings_and_sparse_cells(self):
+        path = Path(self.tmp_dir) / "hand.xlsx"
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("xl/workbook.xml", _WORKBOOK)
+            zf.writestr("xl/_rels/workbook.xml.rels", _RELS)
+            zf.writestr("xl/sharedStrings.xml", _SHARED)
+            zf.writestr("xl/worksheets/data.xml", _SHEET)
+
+        df = read_xlsx(str(path), columns=["ID", "ADDRESSLINE1"], workers=2, shard_bytes=64)
+
+        self.assertEqual(list(df.columns), ["ID", "ADDRESSLINE1"])
+        # row 4 is absent from the XML: a blank row, as pandas reads it
+        self.assertEqual(df["ID"].tolist()[:2], [1, 2.5])
+        self.assertTrue(pd.isna(df["ID"].iloc[2]))
+        self.assertEqual(df["ID"].iloc[3], "A-3")
+        self.assertEqual(df["ADDRESSLINE1"].tolist()[:2], ["12 King St", "Toronto & Co"])
+        self.assertTrue(df["ADDRESSLINE1"].iloc[2:].isna().all())
+
+    def test_blank_rows_dates_and_empty_cells_match_pandas(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["ID", "ADDRESSLINE1", "RECEIVED", "AT"])
+        ws.append([1, "1 A St", datetime.datetime(2024, 1, 1), datetime.time(10, 30)])
+        ws.append([None, None, None, None])
+        ws.append([2, None, datetime.datetime(2024, 1, 2, 12, 0), None])
+        ws.cell(row=7, column=1, value=3)
+        path = Path(self.tmp_dir) / "gaps.xlsx"
+        wb.save(path)
+
+        for shard_bytes in (10, DEFAULT_SHARD_BYTES):
+            result = read_xlsx(str(path), workers=2, shard_bytes=shard_bytes)
+            pd.testing.assert_frame_equal(result, pd.read_excel(path))
+        self.assertEqual(len(result), 6)
+        self.assertEqual(result["RECEIVED"].iloc[2], pd.Timestamp(2024, 1, 2, 12))
+
+    def test_chunks_match_pandas_in_order(self):
+        n = 500
+        expected = pd.DataFrame({
+            "ID": range(n),
+            "ADDRESSLINE1": [f"{i} Main <St> & Co" for i in range(n)],
+            "ADDRESSLINE2": [None if i % 7 == 0 else "Springfield" for i in range(n)],
+            "ADDRESSLINE3": ["US"] * n,
+        })
+        path = Path(self.tmp_dir) / "big.xlsx"
+        expected.to_excel(path, index=False)
+
+        chunks = list(read_xlsx_chunks(str(path), workers=2, shard_bytes=2_000))
+        self.assertGreater(len(chunks), 2)
+        result = pd.concat(chunks)
+        pd.testing.assert_frame_equal(result, pd.read_excel(path))
+
+    def test_row_ranges_and_counts_match_pandas(self):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(["ID", "ADDRESSLINE1", "ADDRESSLINE2", "ADDRESSLINE3"])
+        for i in range(40):
+            ws.append([None] * 4 if i in (9, 10) else [i, f"{i} Main St", None, "US"])
+        # styled but empty trailing rows are not data
+        ws.cell(row=50, column=2).number_format = "0.00"
+        path = Path(self.tmp_dir) / "shards.xlsx"
+        wb.save(path)
+        # a stale <dimension>, as some writers leave it
+        with zipfile.ZipFile(path) as zf:
+            parts = {name: zf.read(name) for name in zf.namelist()}
+        sheet = "xl/worksheets/sheet1.xml"
+        parts[sheet], replaced = re.subn(rb'<dimension ref="[^"]*"', b'<dimension ref="A1:D3"', parts[sheet])
+        self.assertEqual(replaced, 1)
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in parts.items():
+                zf.writestr(name, data)
+
+        expected = pd.read_excel(path)
+        self.assertEqual(count_xlsx_rows(str(path), block_bytes=100), len(expected))
+
+        extractor = ExcelExtractor(self.tmp_dir, os.path.join(self.tmp_dir, "out"))
+        self.assertEqual(extractor.count_rows("shards.xlsx"), 40)
+        for start, end in ((0, 7), (7, 12), (9, 11), (30, 50), (40, 45)):
+            for block_bytes in (100, DEFAULT_BLOCK_BYTES):
+                result = read_xlsx_rows(str(path), start, end, block_bytes=block_bytes)
+                want = expected.iloc[start:end].reset_index(drop=True)
+                pd.testing.assert_frame_equal(result, want, check_dtype=False, obj=f"rows {start}-{end}")
+        shard = extractor.read_rows("shards.xlsx", 8, 12)
+        self.assertEqual(list(shard.index), [8, 9, 10, 11])
+        self.assertTrue(shard.loc[[9, 10]].isna().all().all())
+
+    def test_extractor_uses_parallel_reader(self):
+        input_dir = os.path.join(self.tmp_dir, "in")
+        os.makedirs(input_dir)
+        pd.DataFrame({
+            "ID": [1, 2], "ADDRESSLINE1": ["a1", "a2"], "ADDRESSLINE2": ["b1", "b2"],
+            "ADDRESSLINE3": ["c1", "c2"], "OTHER": ["x", "y"]
+        }).to_excel(Path(input_dir) / "sample.xlsx", index=False)
+
+        extractor = ExcelExtractor(input_dir, os.path.join(self.tmp_dir, "out"), workers=2)
+        out_df = pd.read_excel(extractor.extract("sample.xlsx"))
+
+        self.assertEqual(list(out_df.columns), ExcelExtractor.REQUIRED_COLUMNS)
+        self.assertEqual(out_df["ADDRESSLINE3"].tolist(), ["c1", "c2"])
+
+        with self.assertRaises(FileNotFoundError):
+            extractor.extract("missing.xlsx")
+
+
+if __name__ == "__main__":
+    unittest.main()